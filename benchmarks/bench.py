@@ -0,0 +1,369 @@
+"""Бенчмарки гарячих шляхів AddressBook та NotesBook на синтетичних даних.
+
+Для кожної операції вимірюються перцентилі затримки, пропускна здатність і пікова пам'ять.
+Результати пишуться у JSON і порівнюються зі збереженою базою: регресія -> код виходу 1.
+
+Запуск:
+    python benchmarks/bench.py                          # 1k та 100k, порівняння з baseline.json
+    python benchmarks/bench.py --sizes 1k,100k,1M --output results.json
+    python benchmarks/bench.py --update-baseline        # записати поточні результати як базу
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORDS = ("кава", "борщ", "python", "deadline", "вишиванка", "проєкт", "meeting", "reminder",
+         "snake", "дедлайн", "свято", "робота", "code", "review", "release", "понеділок")
+TAGS = ("work", "home", "Work", "ідеї", "python", "borsch", "travel", "shopping")
+
+
+#Синтетичні дані
+def make_contacts(count, seed=1): # книга з count контактами; поля відновлюються без повторної перевірки
+    rng = random.Random(seed)
+    book = main.AddressBook()
+    records = []
+    for i in range(count):
+        record = main.Record.__new__(main.Record)
+        record.__setstate__((
+            f"Contact{i:07d}",
+            array("Q", [rng.randrange(10 ** 9, 10 ** 10) for _ in range(rng.randint(1, 3))]),
+            f"user{i}@{rng.choice(('gmail.com', 'ukr.net', 'example.com'))}" if rng.random() < 0.7 else None,
+            f"м. Київ, вул. Лісова {rng.randint(1, 200)}" if rng.random() < 0.5 else None,
+            datetime(rng.randint(1950, 2015), rng.randint(1, 12), rng.randint(1, 28)) if rng.random() < 0.8 else None,
+        ))
+        records.append(record)
+    book.add_records(records)
+    return book
+
+
+def make_notes(count, seed=2): # блокнот з count нотатками
+    rng = random.Random(seed)
+    book = main.NotesBook()
+    for i in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30)))
+        book.add_note(main.NoteRecord(f"Note{i:07d}", text, rng.choice(TAGS) if rng.random() < 0.8 else None))
+    return book
+
+
+#Операції
+BENCHMARKS = [] # (розділ, назва, функція підготовки, що повертає вимірювану функцію без аргументів)
+
+
+def benchmark(section, name):
+    def register(setup):
+        BENCHMARKS.append((section, name, setup))
+        return setup
+    return register
+
+
+@benchmark("contacts", "get_upcoming_birthdays")
+def _upcoming(ctx):
+    ctx.contacts.get_upcoming_birthdays(7) # перший виклик будує індекс; міряємо сталий режим
+    return lambda: ctx.contacts.get_upcoming_birthdays(7)
+
+
+@benchmark("contacts", "find_by_phone_prefix")
+def _phone_prefix(ctx):
+    ctx.contacts.find_by_phone_prefix("0") # побудова індексу
+    return lambda: ctx.contacts.find_by_phone_prefix(str(ctx.rng.randrange(100, 1000)), limit=50)
+
+
+@benchmark("contacts", "query")
+def _query(ctx): # домен + місяць + частина адреси: планувальник перетинає індекси
+    ctx.contacts.query(email_domain="gmail.com", birthday_month=1, address="Лісова") # побудова індексів
+    return lambda: ctx.contacts.query(email_domain="gmail.com", birthday_month=ctx.rng.randint(1, 12),
+                                      address=f"Лісова {ctx.rng.randint(1, 200)}")
+
+
+@benchmark("contacts", "complete")
+def _complete(ctx): # перші 10 імен за префіксом — бінарний пошук у відсортованих іменах
+    ctx.contacts.complete("Contact") # побудова індексу
+    return lambda: ctx.contacts.complete(f"Contact{ctx.rng.randrange(len(ctx.contacts)):07d}"[:-2], 10)
+
+
+@benchmark("contacts", "find_duplicates")
+def _find_duplicates(ctx): # один прохід по книзі з блоками за номером, email і кістяком імені
+    return ctx.contacts.find_duplicates
+
+
+@benchmark("contacts", "show_all")
+def _show_all(ctx):
+    return lambda: sum(1 for _ in main.show_all([], ctx.contacts))
+
+
+@benchmark("contacts", "save_data")
+def _save_data(ctx):
+    return lambda: main.save_data(ctx.contacts, ctx.path("addressbook.pkl"))
+
+
+@benchmark("contacts", "load_data")
+def _load_data(ctx): # бінарний знімок зі стисненням zlib
+    main.save_data(ctx.contacts, ctx.path("addressbook.pkl"))
+    return lambda: main.load_data(ctx.path("addressbook.pkl"))
+
+
+@benchmark("contacts", "save_pickle")
+def _save_pickle(ctx): # попередній формат save_data — для порівняння
+    def run():
+        with open(ctx.path("legacy.pkl"), "wb") as f:
+            pickle.dump(ctx.contacts, f)
+    return run
+
+
+@benchmark("contacts", "load_pickle")
+def _load_pickle(ctx): # через обмежений unpickler load_data
+    _save_pickle(ctx)()
+    return lambda: main.load_data(ctx.path("legacy.pkl"))
+
+
+def _contact_shards(ctx): # каталог шардів з контактами контексту (створюється один раз)
+    directory = ctx.path("contacts.shards")
+    if not os.path.exists(directory):
+        book = main.open_sharded_address_book(directory)
+        book.add_records(list(ctx.contacts.records()))
+        book.close()
+    return directory
+
+
+@benchmark("contacts", "load_sharded")
+def _load_sharded(ctx): # шарди читаються пулом процесів (на одному ядрі — послідовно)
+    directory = _contact_shards(ctx)
+    return lambda: main.open_sharded_address_book(directory)
+
+
+@benchmark("contacts", "save_sharded_one_change")
+def _save_sharded(ctx): # після зміни одного запису переписується лише його шард
+    book = main.open_sharded_address_book(_contact_shards(ctx))
+    record = next(iter(book.records()))
+    def run():
+        record.replace_phones([str(ctx.rng.randrange(10 ** 9, 10 ** 10))])
+        book.flush()
+    return run
+
+
+@benchmark("notes", "search_by_text")
+def _search_text(ctx):
+    ctx.notes.search_by_text("кава") # побудова індексу
+    return lambda: ctx.notes.search_by_text(ctx.rng.choice(WORDS))
+
+
+@benchmark("notes", "search_by_name")
+def _search_name(ctx):
+    return lambda: ctx.notes.search_by_name(f"Note{ctx.rng.randrange(len(ctx.notes)):07d}"[:-1])
+
+
+@benchmark("notes", "complete")
+def _complete_notes(ctx):
+    ctx.notes.complete("Note") # побудова індексу
+    return lambda: ctx.notes.complete(f"Note{ctx.rng.randrange(len(ctx.notes)):07d}"[:-2], 10)
+
+
+@benchmark("notes", "search_by_tag")
+def _search_tag(ctx):
+    return lambda: ctx.notes.search_by_tag(ctx.rng.choice(TAGS))
+
+
+@benchmark("notes", "show_notes")
+def _show_notes(ctx):
+    return lambda: sum(1 for _ in main.show_notes([], ctx.notes))
+
+
+@benchmark("notes", "NotesBook.save")
+def _notes_save(ctx):
+    return lambda: ctx.notes.save(ctx.path("notes.json"))
+
+
+@benchmark("notes", "NotesBook.load")
+def _notes_load(ctx):
+    ctx.notes.save(ctx.path("notes.json"))
+    return lambda: main.NotesBook().load(ctx.path("notes.json"))
+
+
+@benchmark("notes", "NotesBook.save_binary")
+def _notes_save_binary(ctx):
+    return lambda: ctx.notes.save_binary(ctx.path("notes.snap"))
+
+
+@benchmark("notes", "NotesBook.load_binary")
+def _notes_load_binary(ctx):
+    ctx.notes.save_binary(ctx.path("notes.snap"))
+    return lambda: main.NotesBook().load(ctx.path("notes.snap"))
+
+
+@benchmark("notes", "NotesBook.load_shards")
+def _notes_load_shards(ctx):
+    ctx.notes.save_shards(ctx.path("notes.shards"))
+    ctx.notes._shards = None # далі книга контексту не відстежує шарди
+    return lambda: main.NotesBook().load_shards(ctx.path("notes.shards"))
+
+
+@benchmark("notes", "NotesBook.load_mapped")
+def _notes_load_mapped(ctx): # знімок з індексом: читаються лише назви та зміщення
+    main.write_mapped_notes(ctx.path("mapped.json"),
+                            ((name, main._note_json(note)) for name, note in ctx.notes.data.items()))
+    return lambda: main.NotesBook().load(ctx.path("mapped.json"))
+
+
+#Вимірювання
+class Context:
+    def __init__(self, size, tmpdir):
+        self.size = size
+        self.tmpdir = tmpdir
+        self.rng = random.Random(size)
+        self._contacts = self._notes = None
+
+    @property
+    def contacts(self):
+        if self._contacts is None:
+            self._contacts = make_contacts(self.size)
+        return self._contacts
+
+    @property
+    def notes(self):
+        if self._notes is None:
+            self._notes = make_notes(self.size)
+        return self._notes
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def measure(run, min_repeat=5, max_repeat=1000, budget=2.0): # повторює, доки не вичерпано бюджет часу
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_repeat and (len(samples) < min_repeat or time.perf_counter() - started < budget):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start() # пік пам'яті — окремим прогоном, щоб трасування не спотворило час
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "runs": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "ops_per_sec": len(samples) / sum(samples),
+        "peak_bytes": peak,
+    }
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    for suffix, factor in (("k", 1_000), ("m", 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def size_label(size):
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}M"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def run_all(sizes, only=None, budget=2.0):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx = Context(size, tmpdir)
+            for section, name, setup in BENCHMARKS:
+                key = f"{section}.{name}@{size_label(size)}"
+                if only and not any(part in key for part in only):
+                    continue
+                results[key] = measure(setup(ctx), budget=budget)
+                r = results[key]
+                print(f"{key:45} p50 {r['p50_ms']:10.3f} ms  p95 {r['p95_ms']:10.3f} ms  "
+                      f"{r['ops_per_sec']:10.1f} op/s  peak {r['peak_bytes'] / 1024:10.0f} KiB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance): # список регресій відносно бази
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("p50_ms", "peak_bytes"):
+            # дрібні абсолютні значення шумлять, тож для них потрібен запас більший за відсоток
+            floor = 0.05 if metric == "p50_ms" else 64 * 1024
+            if result[metric] > base[metric] * (1 + tolerance) + floor:
+                regressions.append(f"{key}: {metric} {base[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,100k", help="розміри даних через кому, наприклад 1k,100k,1M")
+    parser.add_argument("--only", help="виконати лише операції, назва яких містить один із підрядків (через кому)")
+    parser.add_argument("--budget", type=float, default=2.0, help="секунд на одну операцію")
+    parser.add_argument("--output", help="файл для результатів у JSON")
+    parser.add_argument("--baseline", default=BASELINE, help="файл бази для порівняння")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="допустиме погіршення (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="записати результати як нову базу")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    results = run_all(sizes, args.only.split(",") if args.only else None, args.budget)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        baseline.update(results)
+        report["results"] = baseline
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Базу оновлено: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Бази {args.baseline} немає — порівняння пропущено (див. --update-baseline)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f)["results"], args.tolerance)
+    if regressions:
+        print("\n❌ РЕГРЕСІЇ відносно бази:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print("\n✅ Регресій немає")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,78 @@
+"""Пам'ять на один контакт: компактний Record (__slots__, телефони в array) проти старого представлення.
+
+Запуск: python benchmarks/memory_records.py [--count 1000000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+class LegacyField: # поля й запис у тому вигляді, як вони були до __slots__: кожен об'єкт має __dict__
+    def __init__(self, value):
+        self.value = value
+
+
+class LegacyRecord:
+    def __init__(self, name):
+        self.name = LegacyField(name)
+        self.phones = []
+        self.email = None
+        self.address = None
+        self.birthday = None
+
+
+def build_legacy(count):
+    records = {}
+    for i in range(count):
+        record = LegacyRecord(f"Contact{i}")
+        record.phones.append(LegacyField(f"{i % 10_000_000_000:010d}"))
+        record.email = LegacyField(f"user{i}@example.com")
+        record.birthday = LegacyField(datetime.strptime(f"{i % 28 + 1:02d}.05.1990", "%d.%m.%Y"))
+        records[record.name.value] = record
+    return records
+
+
+def build_compact(count):
+    book = main.AddressBook()
+    for i in range(count):
+        record = main.Record(f"Contact{i}")
+        record.add_phone(f"{i % 10_000_000_000:010d}")
+        record.email = main.Email(f"user{i}@example.com")
+        record.add_birthday(f"{i % 28 + 1:02d}.05.1990")
+        book.add_record(record)
+    return book
+
+
+def measure(build, count): # байтів на контакт за tracemalloc (разом з рядками та словником книги)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return (after - before) / count
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000, help="кількість контактів")
+    args = parser.parse_args()
+
+    legacy = measure(build_legacy, args.count)
+    compact = measure(build_compact, args.count)
+    print(f"contacts:        {args.count}")
+    print(f"legacy bytes:    {legacy:.0f} per contact")
+    print(f"compact bytes:   {compact:.0f} per contact")
+    print(f"reduction:       {(1 - compact / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main_cli()
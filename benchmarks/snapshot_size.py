@@ -0,0 +1,55 @@
+"""Розмір файлу й час завантаження: бінарний знімок (без стиснення, zlib, lzma) проти pickle та JSON.
+
+Запуск: python benchmarks/snapshot_size.py [--count 100000]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from bench import make_contacts, make_notes
+
+
+def measure(save, load, path): # (розмір у байтах, секунд на завантаження)
+    save(path)
+    started = time.perf_counter()
+    load(path)
+    return os.path.getsize(path), time.perf_counter() - started
+
+
+def save_pickle(book, path): # попередній формат save_data
+    with open(path, "wb") as f:
+        pickle.dump(book, f)
+
+
+def load_notes(path):
+    main.NotesBook().load(path)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000, help="кількість контактів і нотаток")
+    args = parser.parse_args()
+
+    contacts, notes = make_contacts(args.count), make_notes(args.count)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rows = [("contacts pickle", measure(lambda p: save_pickle(contacts, p), main.load_data, os.path.join(tmpdir, "c.pkl")))]
+        rows += [(f"contacts snapshot {c or 'raw'}",
+                  measure(lambda p: main.save_data(contacts, p, c), main.load_data, os.path.join(tmpdir, f"c.{c}")))
+                 for c in main.SNAPSHOT_COMPRESSION]
+        rows.append(("notes json", measure(notes.save, load_notes, os.path.join(tmpdir, "n.json"))))
+        rows += [(f"notes snapshot {c or 'raw'}",
+                  measure(lambda p: notes.save_binary(p, c), load_notes, os.path.join(tmpdir, f"n.{c}")))
+                 for c in main.SNAPSHOT_COMPRESSION]
+    print(f"records: {args.count}")
+    for label, (size, seconds) in rows:
+        print(f"{label:<26} {size / 1024:>10.0f} KiB  load {seconds * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main_cli()
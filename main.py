@@ -1,42 +1,576 @@
+import time # для вимірювання тривалості команд і запуску
+_IMPORT_STARTED = time.perf_counter()
+# Решта важких модулів (json, pickle, re, sqlite3, csv, multiprocessing, asyncio...) імпортується
+# всередині функцій, яким вони потрібні: коротка команда з cron не платить за те, чим не користується
 from collections import UserDict # для створення класу AddressBook, що наслідує UserDict
+from collections import Counter # для підрахунку спільних біграм у нечіткому пошуку
+from collections import OrderedDict # LRU-кеш розпакованих нотаток
+from collections.abc import MutableMapping # сховище нотаток, що поводиться як dict
 from datetime import datetime, timedelta # для роботи з датами та часом
-import pickle # для серіалізації та десеріалізації даних
-import re # для перевірки формату email
-import textwrap # для форматування тексту нотаток, переносу текста, щоб була краса в терміналі)
-import json # для збереження та завантаження нотаток у форматі JSON
+import sys # для читання пакетних команд зі stdin
+import contextlib # щоб однаково працювати з файлом команд і stdin
+import atexit # щоб скинути статистику команд у файл при виході
+import os # для атомарної заміни файлів збереження
+import threading # для фонового ущільнення журналу нотаток
+import bisect # для відсортованих індексів
+import itertools # для посторінкового виведення без побудови всього списку
+import zlib # crc32 для розкладання записів по шардах
+from array import array # для компактного зберігання телефонів як чисел
 
 #Серелізація
-def save_data(book, filename="addressbook.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+# Бінарний знімок: сигнатура, версія, вид книги та спосіб стиснення, далі блоки до SNAPSHOT_BLOCK записів.
+# Блок — 4 байти довжини і (стиснений) вміст: нові рядки спільної таблиці (теги, домени email) та стовпці полів.
+# Таблиця накопичується від блоку до блоку, тож знімок пишеться й читається потоково; блок нульової довжини — кінець.
+SNAPSHOT_MAGIC = b"SNKS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BLOCK = 4096
+SNAPSHOT_KINDS = ("contacts", "notes")
+SNAPSHOT_COMPRESSION = (None, "zlib", "lzma")
+_NO_STRING = 0xFFFFFFFF # довжина відсутнього рядка (None)
+
+def _codec(compression): # (стиснути, розпакувати)
+    if compression == "zlib":
+        return zlib.compress, zlib.decompress
+    if compression == "lzma":
+        import lzma
+        return lzma.compress, lzma.decompress
+    return bytes, bytes
+
+def _put_array(out, typecode, values): # кількість і числа у little-endian
+    values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    out += len(values).to_bytes(4, "little")
+    out += values.tobytes()
+
+def _get_array(buf, pos, typecode):
+    values = array(typecode)
+    end = pos + 4 + int.from_bytes(buf[pos:pos + 4], "little") * values.itemsize
+    values.frombytes(buf[pos + 4:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+def _put_strings(out, strings): # довжини рядків (None — _NO_STRING) і їхній спільний текст у UTF-8
+    _put_array(out, "I", [_NO_STRING if s is None else len(s) for s in strings])
+    text = "".join(s for s in strings if s is not None).encode()
+    out += len(text).to_bytes(4, "little")
+    out += text
+
+def _get_strings(buf, pos):
+    lengths, pos = _get_array(buf, pos, "I")
+    end = pos + 4 + int.from_bytes(buf[pos:pos + 4], "little")
+    text = buf[pos + 4:end].decode()
+    strings = []
+    start = 0
+    for length in lengths:
+        if length == _NO_STRING:
+            strings.append(None)
+        else:
+            strings.append(text[start:start + length])
+            start += length
+    return strings, end
+
+def _encode_block(kind, records, table): # table — рядок -> номер у спільній таблиці, доповнюється
+    new = []
+    def intern(value): # номер у таблиці + 1; 0 — значення немає
+        if value is None:
+            return 0
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+            new.append(value)
+        return index + 1
+    columns = bytearray()
+    _put_strings(columns, [record.name.value for record in records])
+    if kind == "notes":
+        _put_strings(columns, [note.text.value for note in records])
+        _put_array(columns, "I", [intern(note.tag.value if note.tag else None) for note in records])
+    else:
+        emails = [record.email.value.rpartition("@") if record.email else (None, None, None) for record in records]
+        _put_array(columns, "H", [len(record._phones) for record in records])
+        _put_array(columns, "Q", [number for record in records for number in record._phones])
+        _put_strings(columns, [local for local, _, _ in emails])
+        _put_array(columns, "I", [intern(domain) for _, _, domain in emails])
+        _put_strings(columns, [record.address.value if record.address else None for record in records])
+        _put_array(columns, "i", [record.birthday.value.toordinal() if record.birthday else 0 for record in records])
+    block = bytearray()
+    _put_strings(block, new)
+    return block + columns
+
+def _decode_block(kind, block, table):
+    new, pos = _get_strings(block, 0)
+    table.extend(new)
+    names, pos = _get_strings(block, pos)
+    if kind == "notes":
+        texts, pos = _get_strings(block, pos)
+        tags, pos = _get_array(block, pos, "I")
+        for name, text, tag in zip(names, texts, tags):
+            yield NoteRecord.restore({"name": name, "text": text, "tag": table[tag - 1] if tag else None})
+        return
+    counts, pos = _get_array(block, pos, "H")
+    phones, pos = _get_array(block, pos, "Q")
+    locals_, pos = _get_strings(block, pos)
+    domains, pos = _get_array(block, pos, "I")
+    addresses, pos = _get_strings(block, pos)
+    birthdays, pos = _get_array(block, pos, "i")
+    start = 0
+    for name, count, local, domain, address, birthday in zip(names, counts, locals_, domains, addresses, birthdays):
+        record = Record.__new__(Record)
+        record.__setstate__((
+            name,
+            phones[start:start + count],
+            f"{local}@{table[domain - 1]}" if domain else None,
+            address,
+            datetime.fromordinal(birthday) if birthday else None,
+        ))
+        start += count
+        yield record
+
+def write_snapshot(filename, kind, records, compression="zlib"): # пише блок за блоком і атомарно підміняє файл; повертає кількість записів
+    compress, _ = _codec(compression)
+    table = {}
+    records = iter(records)
+    count = 0
+    tmp_name = filename + ".tmp"
+    with open(tmp_name, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + bytes((SNAPSHOT_VERSION, SNAPSHOT_KINDS.index(kind), SNAPSHOT_COMPRESSION.index(compression))))
+        while True:
+            block = list(itertools.islice(records, SNAPSHOT_BLOCK))
+            if not block:
+                break
+            data = compress(_encode_block(kind, block, table))
+            f.write(len(data).to_bytes(4, "little"))
+            f.write(data)
+            count += len(block)
+        f.write(bytes(4))
+    os.replace(tmp_name, filename)
+    return count
+
+def is_snapshot(f): # чи файл починається з сигнатури знімка; позиція — одразу після неї
+    if f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC:
+        return True
+    f.seek(0)
+    return False
+
+def read_snapshot(f, kind): # записи знімка, блок за блоком; f — відкритий файл після is_snapshot
+    header = f.read(3)
+    if len(header) < 3 or header[0] != SNAPSHOT_VERSION or header[1] >= len(SNAPSHOT_KINDS) or header[2] >= len(SNAPSHOT_COMPRESSION):
+        raise ValueError("Непідтримувана версія знімка")
+    if SNAPSHOT_KINDS.index(kind) != header[1]:
+        raise ValueError(f"Це знімок {SNAPSHOT_KINDS[header[1]]}, а не {kind}")
+    _, decompress = _codec(SNAPSHOT_COMPRESSION[header[2]])
+    table = []
+    while True:
+        size = f.read(4)
+        if len(size) < 4:
+            raise ValueError("Знімок обрізано")
+        size = int.from_bytes(size, "little")
+        if not size:
+            return
+        block = f.read(size)
+        if len(block) < size:
+            raise ValueError("Знімок обрізано")
+        yield from _decode_block(kind, decompress(block), table)
+
+def is_snapshot_file(filename):
+    try:
+        with open(filename, "rb") as f:
+            return is_snapshot(f)
+    except FileNotFoundError:
+        return False
 
-def load_data(filename="addressbook.pkl"):
+PICKLE_BOOK_CLASSES = {"AddressBook", "Record", "Field", "Name", "Phone", "Email", "Address", "Birthday"}
+PICKLE_SAFE_GLOBALS = { # усе, що потрібно старим файлам книги, крім наших класів
+    ("datetime", "datetime"), ("array", "array"), ("array", "_array_reconstructor"),
+    ("copyreg", "_reconstructor"), ("builtins", "object"),
+}
+
+def _load_pickle(f): # старий pickle-файл: лише класи книги, дати й масиви, а не довільний код
+    import pickle
+
+    class BookUnpickler(pickle.Unpickler):
+        def find_class(self, module, name):
+            if module in ("__main__", __name__) and name in PICKLE_BOOK_CLASSES:
+                return globals()[name]
+            if (module, name) in PICKLE_SAFE_GLOBALS:
+                return super().find_class(module, name)
+            raise pickle.UnpicklingError(f"Файл книги посилається на заборонений об'єкт {module}.{name}")
+
+    return BookUnpickler(f).load()
+
+def save_data(book, filename="addressbook.pkl", compression="zlib"): # бінарний знімок книги (write_snapshot)
+    write_snapshot(filename, "contacts", book.stream_records(), compression)
+
+def load_data(filename="addressbook.pkl"): # знімок або старий pickle — визначається за сигнатурою
     try:
         with open(filename, "rb") as f:
-            return pickle.load(f)
+            if not is_snapshot(f):
+                return _load_pickle(f)
+            book = AddressBook()
+            book.add_records(list(read_snapshot(f, "contacts")))
+            return book
     except FileNotFoundError:
         return AddressBook()
 
+# Оновлення наявного рядка зберігає його rowid, тож порядок записів у базі — порядок додавання
+_UPSERT_CONTACT = (
+    "INSERT INTO contacts VALUES (?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+    "phones = excluded.phones, email = excluded.email, address = excluded.address, birthday = excluded.birthday"
+)
+
+class SqlitePhoneIndex: # той самий інтерфейс, що й PhoneIndex, але над таблицею phones: пам'ять не росте з книгою
+    def __init__(self, conn):
+        self.conn = conn
+
+    def lookup(self, phone): # імена з точно таким номером
+        return [name for (name,) in self.conn.execute("SELECT name FROM phones WHERE number = ? ORDER BY name", (phone,))]
+
+    def count_prefix(self, prefix): # скільки номерів починається з prefix — пошуком у первинному ключі
+        return self.conn.execute("SELECT COUNT(*) FROM phones WHERE number >= ? AND number < ?",
+                                 (prefix, prefix + ":")).fetchone()[0] # ":" іде одразу після цифр
+
+    def prefix(self, prefix, limit=None): # пари (номер, ім'я), номер яких починається з prefix
+        return self.conn.execute("SELECT number, name FROM phones WHERE number >= ? AND number < ? "
+                                 "ORDER BY number, name LIMIT ?", (prefix, prefix + ":", -1 if limit is None else limit)).fetchall()
+
+class SqliteStorage: # сховище контактів у SQLite: кожен запис — окремий рядок, зміни пишуться одразу
+    autocommit = True # False — зміни накопичуються в одній транзакції до flush() (пакетний режим)
+
+    def __init__(self, filename="addressbook.db"):
+        import sqlite3
+        self.filename = filename
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL") # запис не блокує читання, збій не псує базу
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS contacts ("
+                "name TEXT PRIMARY KEY, phones TEXT NOT NULL, email TEXT, address TEXT, birthday TEXT)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute( # нормалізовані номери: пошук за номером і префіксом без завантаження записів
+                "CREATE TABLE IF NOT EXISTS phones (number TEXT NOT NULL, name TEXT NOT NULL, "
+                "PRIMARY KEY (number, name)) WITHOUT ROWID"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS phones_by_name ON phones (name)")
+        if self.get_meta("phones_indexed") is None: # база попередньої версії — заповнюємо phones один раз
+            with self.conn:
+                self._save_phones(self.conn.execute("SELECT name, phones FROM contacts").fetchall())
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('phones_indexed', '1')")
+        self.phones = SqlitePhoneIndex(self.conn)
+
+    def _save_rows(self, rows): # рядки contacts разом з їхніми номерами в phones
+        rows = list(rows)
+        self.conn.executemany(_UPSERT_CONTACT, rows)
+        self._save_phones([(row[0], row[1]) for row in rows])
+
+    def _save_phones(self, rows): # rows — пари (ім'я, номери через кому)
+        self.conn.executemany("DELETE FROM phones WHERE name = ?", [(name,) for name, _ in rows])
+        self.conn.executemany("INSERT OR IGNORE INTO phones VALUES (?, ?)",
+                              [(number, name) for name, phones in rows if phones for number in phones.split(",")])
+
+    @staticmethod
+    def _to_row(record):
+        data = record.to_dict()
+        return (data["name"], ",".join(data["phones"]), data["email"], data["address"], data["birthday"])
+
+    @staticmethod
+    def _from_row(row):
+        name, phones, email, address, birthday = row
+        return Record.from_dict({
+            "name": name,
+            "phones": phones.split(",") if phones else [],
+            "email": email,
+            "address": address,
+            "birthday": birthday,
+        })
+
+    def _commit(self):
+        if self.autocommit:
+            self.conn.commit()
+
+    def save_record(self, record): # вставляє або оновлює один запис
+        self._save_rows([self._to_row(record)])
+        self._commit()
+
+    def save_many(self, records): # зберігає багато записів однією транзакцією
+        self._save_rows(map(self._to_row, records))
+        self._commit()
+
+    def delete_record(self, name):
+        self.conn.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM phones WHERE name = ?", (name,))
+        self._commit()
+
+    def flush(self): # фіксує накопичені зміни
+        self.conn.commit()
+
+    def load_record(self, name): # повертає Record або None, якщо такого імені немає
+        row = self.conn.execute(
+            "SELECT name, phones, email, address, birthday FROM contacts WHERE name = ?", (name,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def iter_records(self):
+        cursor = self.conn.execute("SELECT name, phones, email, address, birthday FROM contacts ORDER BY rowid")
+        for row in cursor:
+            yield self._from_row(row)
+
+    def iter_names(self): # лише імена — без розбору й перевірки полів записів
+        for (name,) in self.conn.execute("SELECT name FROM contacts ORDER BY rowid"):
+            yield name
+
+    def has(self, name):
+        return self.conn.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def migrate_pickle(storage, filename="addressbook.pkl"): # одноразове перенесення старої книги з pickle у SQLite
+    if storage.get_meta("migrated_from") is not None or not os.path.exists(filename):
+        return 0
+    book = load_data(filename)
+    with storage.conn: # записи та позначка міграції потрапляють у базу разом або не потрапляють зовсім
+        storage._save_rows(map(storage._to_row, book.data.values()))
+        storage.conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_from', ?)", (filename,))
+    return len(book.data)
+
+def open_address_book(filename="addressbook.db", legacy_filename="addressbook.pkl"): # відкриває книгу контактів поверх SQLite
+    with timed("завантаження контактів"):
+        storage = SqliteStorage(filename)
+        migrate_pickle(storage, legacy_filename)
+        book = AddressBook()
+        book.attach_storage(storage)
+    return book
+
+#Шардоване збереження: записи розкладено за crc32 імені по N файлах; читання й запис — паралельно
+DEFAULT_SHARDS = 8
+
+def _shard_of(name, shards):
+    return zlib.crc32(name.encode()) % shards
+
+def _map_shards(func, jobs, workers=None): # пул процесів, якщо є кілька ядер і кілька шардів; інакше — у цьому процесі
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [func(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(func, jobs))
+
+def _encode_shard_row(kind, item): # запис -> поля рядка шарду (JSON-сумісні)
+    if kind == "contacts":
+        name, phones, email, address, birthday = item.__getstate__()
+        return [name, phones.tolist(), email, address, birthday.date().isoformat() if birthday else None]
+    return [item.name.value, item.text.value, item.tag.value if item.tag else None]
+
+def _decode_shard_row(kind, fields): # поля рядка -> стан для Record.__setstate__ або аргументи нотатки
+    if kind == "contacts":
+        name, phones, email, address, birthday = fields
+        return (name, array("Q", phones), email, address, datetime.fromisoformat(birthday) if birthday else None)
+    return tuple(fields)
+
+def _read_shard(job): # виконується в процесі пулу: розбір JSON — найдорожча частина завантаження
+    import json
+    path, kind = job
+    rows = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                seq, *fields = json.loads(line)
+                rows.append((seq, fields[0], _decode_shard_row(kind, fields)))
+    except FileNotFoundError:
+        pass
+    return rows
+
+def _write_shard(job): # виконується в процесі пулу: кодує та атомарно підміняє один шард
+    import json
+    path, rows = job
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+class ShardedStore: # каталог з meta.json і шардами shard-NN.jsonl; переписуються лише змінені шарди
+    def __init__(self, directory, kind, shards=DEFAULT_SHARDS, workers=None):
+        import json
+        self.directory = directory
+        self.kind = kind # "contacts" або "notes"
+        self.workers = workers
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                shards = json.load(f)["shards"] # кількість шардів задає вже наявний каталог
+        except FileNotFoundError:
+            pass
+        self.shards = shards
+        self.members = [{} for _ in range(shards)] # шард -> {ім'я: порядковий номер}
+        self.dirty = set()
+        self._next_seq = 0
+
+    def _path(self, shard):
+        return os.path.join(self.directory, f"shard-{shard:02d}.jsonl")
+
+    def mark(self, name): # запис додано або змінено
+        shard = _shard_of(name, self.shards)
+        members = self.members[shard]
+        if name not in members:
+            members[name] = self._next_seq
+            self._next_seq += 1
+        self.dirty.add(shard)
+
+    def forget(self, name): # запис видалено
+        shard = _shard_of(name, self.shards)
+        if self.members[shard].pop(name, None) is not None:
+            self.dirty.add(shard)
+
+    def load(self): # пари (ім'я, стан) з усіх шардів у порядку додавання
+        import heapq
+        jobs = [(self._path(shard), self.kind) for shard in range(self.shards)]
+        for seq, name, state in heapq.merge(*_map_shards(_read_shard, jobs, self.workers)):
+            self.members[_shard_of(name, self.shards)][name] = seq
+            self._next_seq = seq + 1
+            yield name, state
+
+    def save(self, lookup): # lookup(ім'я) -> запис; кодує та пише лише брудні шарди
+        import json
+        if not self.dirty:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        meta = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(meta):
+            _write_json_atomic(meta, {"version": 1, "kind": self.kind, "shards": self.shards})
+        jobs = [
+            (self._path(shard), [[seq, *_encode_shard_row(self.kind, lookup(name))]
+                                 for name, seq in sorted(self.members[shard].items(), key=lambda item: item[1])])
+            for shard in sorted(self.dirty)
+        ]
+        _map_shards(_write_shard, jobs, self.workers)
+        self.dirty.clear()
+        return len(jobs)
+
+class ShardedStorage: # сховище контактів у шардах — заміна SqliteStorage для великих книг, що вантажаться цілком
+    autocommit = False # шард переписується цілком, тож зміни накопичуються до flush() або close()
+
+    def __init__(self, directory="addressbook.shards", shards=DEFAULT_SHARDS, workers=None):
+        self.store = ShardedStore(directory, "contacts", shards, workers)
+        self.records = {} # ім'я -> Record, з якого пишеться шард
+        self._loaded = False
+
+    def save_record(self, record):
+        self.records[record.name.value] = record
+        self.store.mark(record.name.value)
+
+    def save_many(self, records):
+        for record in records:
+            self.save_record(record)
+
+    def delete_record(self, name):
+        self.records.pop(name, None)
+        self.store.forget(name)
+
+    def iter_records(self): # перше звернення вантажить усі шарди (паралельно)
+        if not self._loaded:
+            for name, state in self.store.load():
+                record = Record.__new__(Record)
+                record.__setstate__(state)
+                self.records.setdefault(name, record)
+            self._loaded = True
+        return iter(list(self.records.values()))
+
+    def iter_names(self):
+        return (record.name.value for record in self.iter_records())
+
+    def load_record(self, name):
+        return self.records.get(name)
+
+    def has(self, name):
+        return name in self.records
+
+    def count(self):
+        return len(self.records)
+
+    def flush(self):
+        self.store.save(self.records.__getitem__)
+
+    def close(self):
+        self.flush()
+
+def open_sharded_address_book(directory="addressbook.shards", shards=DEFAULT_SHARDS, workers=None):
+    book = AddressBook()
+    with timed("завантаження контактів"):
+        book.attach_storage(ShardedStorage(directory, shards, workers), lazy=False)
+    return book
+
+STORAGE_SHARDS = None # None — SQLite і журнал нотаток; число — шардовані каталоги (--storage shards[:N])
+
+def open_contact_book(): # книга контактів у сховищі, вибраному параметром --storage
+    if STORAGE_SHARDS is None:
+        return open_address_book()
+    if not os.path.isdir("addressbook.shards") and os.path.exists("addressbook.db"): # перший запуск у шардах — переносимо книгу з SQLite
+        old = open_address_book()
+        storage = ShardedStorage("addressbook.shards", STORAGE_SHARDS)
+        storage.save_many(old.stream_records())
+        storage.flush()
+        old.close()
+    return open_sharded_address_book(shards=STORAGE_SHARDS)
+
 #опис класів
 class Field:
+    __slots__ = ("value",) # без __dict__ кожне поле займає в рази менше пам'яті
+
     def __init__(self, value):
         self.value = value
     def __str__(self):
         return str(self.value)
 
+    def __getstate__(self):
+        return {"value": self.value}
+
+    @classmethod
+    def restore(cls, value): # створює поле з уже перевіреного значення, без повторної перевірки
+        field = cls.__new__(cls)
+        field.value = value
+        return field
+
+    def __setstate__(self, state): # підходить і для старих pickle-файлів, де поле мало __dict__
+        self.value = state["value"]
+
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         if not value:
             raise ValueError("⚠️ Ім’я є обов’язковим для створення контакту. Спробуй ще раз.")
         super().__init__(value)
 
 class Phone(Field):
+    __slots__ = ()
+
     def __init__(self, value):
-        if not (len(value) == 10):
+        if not (len(value) == 10 and value.isascii() and value.isdigit()):
             raise ValueError("Номер телефону має містити рівно 10 цифр. Спробуй ще раз.") 
         super().__init__(value)
 
+    @classmethod
+    def from_packed(cls, number): # відновлює Phone з упакованого числа без повторної перевірки
+        return cls.restore(f"{number:010d}")
+
+def _pack_phone(phone): # номер -> число для масиву телефонів; None, якщо це не номер
+    if len(phone) == 10 and phone.isascii() and phone.isdigit():
+        return int(phone)
+    return None
+
 class Birthday(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         try:
             birthday = datetime.strptime(value, "%d.%m.%Y")
@@ -46,96 +580,969 @@ class Birthday(Field):
 
 #додала класс email та перевірку формата  його введення
 class Email(Field):         
+    __slots__ = ()
+    _pattern = None # регулярний вираз компілюється під час першої перевірки
+
     def __init__(self, value):
-        if not re.match(r"^[\w\.-]+@[\w\.-]+\.\w+$", value):
+        if Email._pattern is None:
+            import re
+            Email._pattern = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+        if not Email._pattern.match(value):
             raise ValueError("Емм... Це не схоже на email. Спробуй у форматі: username@example.com")
         super().__init__(value)
 
 class Address(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         if not value:
             raise ValueError("🐍 Ой, не забувай вказати адресу!")
         super().__init__(value)
 
 class Record:
+    # Без __dict__, а телефони — упаковані 10-значні числа в array, а не окремі об'єкти Phone
+    __slots__ = ("name", "_phones", "_email", "_address", "_birthday", "_book", "_rendered")
+
     def __init__(self, name):
         self.name = Name(name)     # обов'язкове поле
-        self.phones = []           # список телефонів
-        self.email = None          # email можна додати пізніше
-        self.address = None        # адреса — теж пізніше
-        self.birthday = None       # день народження — за бажанням
+        self._phones = array("Q")  # телефони як числа (див. phones)
+        self._email = None         # email можна додати пізніше
+        self._address = None       # адреса — теж пізніше
+        self._birthday = None      # день народження — за бажанням
+        self._book = None          # книга, до якої належить запис; їй повідомляємо про кожну зміну
+        self._rendered = None      # [рядок для all, картка для contact]; скидається при зміні запису
 
     def __str__(self):
-        return f"👤 Contact name: {self.name.value}, 📞 phones: {'; '.join(p.value for p in self.phones)}"
-    
+        return f"👤 Contact name: {self.name.value}, 📞 phones: {'; '.join(self.phone_numbers())}"
+
+    def __getstate__(self): # компактний кортеж значень; посилання на книгу не зберігаємо
+        return (
+            self.name.value,
+            self._phones,
+            self._email.value if self._email else None,
+            self._address.value if self._address else None,
+            self.birthday.value if self.birthday else None,
+        )
+
+    def __setstate__(self, state):
+        self._book = None
+        self._rendered = None
+        if isinstance(state, dict): # старі pickle-файли, де запис мав __dict__ з об'єктами полів
+            self.name = state["name"]
+            self._phones = array("Q", (int(p.value) for p in state.get("phones", ())))
+            self._email = state.get("email", state.get("_email"))
+            self._address = state.get("address", state.get("_address"))
+            self._birthday = state.get("birthday")
+            return
+        name, self._phones, email, address, birthday = state
+        self.name = Name.restore(name)
+        self._email = Email.restore(email) if email else None
+        self._address = Address.restore(address) if address else None
+        self._birthday = Birthday.restore(birthday) if birthday else None
+
+    def _changed(self, field): # повідомляє книгу про зміну поля, щоб вона зберегла запис
+        self._rendered = None # кешоване виведення застаріло
+        if self._book is not None:
+            self._book._record_changed(self, field)
+
+    def _render_cache(self): # список-кеш виведення; його беремо ДО читання полів, тож зміна посеред
+        cache = self._rendered # рендерингу лише від'єднає цей список і застарілий текст не збережеться
+        if cache is None:
+            cache = self._rendered = [None, None]
+        return cache
+
+    @property
+    def phones(self): # телефони як об'єкти Phone, створені на льоту
+        return [Phone.from_packed(number) for number in self._phones]
+
+    def phone_numbers(self): # телефони як рядки, без створення об'єктів Phone
+        return [f"{number:010d}" for number in self._phones]
+
+    @property
+    def email(self):
+        return self._email
+
+    @email.setter
+    def email(self, email):
+        self._email = email
+        self._changed("email")
+
+    @property
+    def address(self):
+        return self._address
+
+    @address.setter
+    def address(self, address):
+        self._address = address
+        self._changed("address")
+
+    @property
+    def birthday(self):
+        return self._birthday
+
+    @birthday.setter
+    def birthday(self, birthday):
+        self._birthday = birthday
+        self._changed("birthday")
 
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))   
-   
+        self._phones.append(int(Phone(phone).value))
+        self._changed("phones")
+
+    def replace_phones(self, phones): # замінює всі телефони; спершу перевіряє нові, щоб не втратити старі
+        self._phones = array("Q", (int(Phone(phone).value) for phone in phones))
+        self._changed("phones")
+
     def add_birthday (self, birthday):
-        self.birthday= Birthday(birthday)
+        self.birthday = Birthday(birthday)
     
     def remove_phone(self, phone):
-        for p in self.phones:
-            if p.value == phone:
-                self.phones.remove(p)
-                break
+        number = _pack_phone(phone)
+        if number is not None and number in self._phones:
+            self._phones.remove(number)
+            self._changed("phones")
 
     def edit_phone(self, old_phone: str, new_phone: str):
-        for i, p in enumerate(self.phones):
-            if p.value == old_phone:
-                self.phones[i] = Phone(new_phone)
-            break
+        number = _pack_phone(old_phone)
+        if number is not None and number in self._phones:
+            self._phones[self._phones.index(number)] = int(Phone(new_phone).value)
+            self._changed("phones")
 
     def find_phone(self, phone: str):
-        for p in self.phones:
-            if p.value == phone:
-                return p
+        number = _pack_phone(phone)
+        if number is not None and number in self._phones:
+            return Phone.from_packed(number)
         return None
-    
+
+    def to_dict(self): # словник для збереження запису поза pickle
+        return {
+            "name": self.name.value,
+            "phones": self.phone_numbers(),
+            "email": self.email.value if self.email else None,
+            "address": self.address.value if self.address else None,
+            "birthday": self.birthday.value.strftime("%d.%m.%Y") if self.birthday else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(data["name"])
+        for phone in data.get("phones") or []:
+            record.add_phone(phone)
+        if data.get("email"):
+            record.email = Email(data["email"])
+        if data.get("address"):
+            record.address = Address(data["address"])
+        if data.get("birthday"):
+            record.add_birthday(data["birthday"])
+        return record
+
+class RecordIndex: # базовий клас індексів книги контактів
+    fields = () # поля запису, зміна яких потребує переіндексації
+    names_only = False # True — індексу досить імен, і книга будує його через from_names, не вантажачи записів
+
+    def __init__(self, records):
+        for record in records:
+            self.add(record)
+
+    def add(self, record): # додає запис або переіндексовує наявний з тим самим ім'ям
+        raise NotImplementedError
+
+    def remove(self, name):
+        raise NotImplementedError
+
+def _is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+class BirthdayIndex(RecordIndex): # дні народження, розкладені по кошиках (місяць, день)
+    fields = ("birthday",)
+
+    def __init__(self, records):
+        self.buckets = {} # (місяць, день) -> імена (dict як впорядкована множина)
+        self.keys = {}    # ім'я -> (місяць, день)
+        super().__init__(records)
+
+    def add(self, record):
+        name = record.name.value
+        self.remove(name)
+        if record.birthday:
+            key = (record.birthday.value.month, record.birthday.value.day)
+            self.keys[name] = key
+            self.buckets.setdefault(key, {})[name] = None
+
+    def remove(self, name):
+        key = self.keys.pop(name, None)
+        if key is not None:
+            names = self.buckets[key]
+            del names[name]
+            if not names:
+                del self.buckets[key]
+
+    def month(self, month): # кошики днів місяця: (день, імена)
+        return [names for (m, _), names in self.buckets.items() if m == month]
+
+    def upcoming(self, today, days): # (дата святкування, ім'я) на days днів уперед, включно з сьогодні
+        seen = set() # за рік кожен кошик трапляється лише раз
+        for offset in range(min(days, 366) + 1):
+            day = today + timedelta(days=offset)
+            keys = [(day.month, day.day)]
+            if day.month == 2 and day.day == 28 and not _is_leap(day.year):
+                keys.append((2, 29)) # народжені 29 лютого святкують 28-го у невисокосний рік
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                for name in self.buckets.get(key, ()):
+                    yield day, name
+
+class PhoneIndex(RecordIndex): # зворотний індекс: номер телефону -> контакти
+    fields = ("phones",)
+
+    def __init__(self, records):
+        self.exact = {}  # номер -> імена (dict як впорядкована множина)
+        self.phones = {} # ім'я -> номери, під якими запис проіндексовано
+        pairs = []
+        for record in records: # будуємо одним сортуванням, а не вставкою по одному
+            name = record.name.value
+            self.phones[name] = tuple(dict.fromkeys(record.phone_numbers()))
+            for phone in self.phones[name]:
+                self.exact.setdefault(phone, {})[name] = None
+                pairs.append((phone, name))
+        pairs.sort()
+        self.sorted = pairs # відсортовані пари (номер, ім'я) для пошуку за префіксом
+
+    def add(self, record):
+        name = record.name.value
+        self.remove(name)
+        self.phones[name] = tuple(dict.fromkeys(record.phone_numbers()))
+        for phone in self.phones[name]:
+            self.exact.setdefault(phone, {})[name] = None
+            bisect.insort(self.sorted, (phone, name))
+
+    def remove(self, name):
+        for phone in self.phones.pop(name, ()):
+            names = self.exact[phone]
+            names.pop(name, None)
+            if not names:
+                del self.exact[phone]
+            i = bisect.bisect_left(self.sorted, (phone, name))
+            if i < len(self.sorted) and self.sorted[i] == (phone, name):
+                del self.sorted[i]
+
+    def lookup(self, phone): # імена з точно таким номером, за абеткою
+        return sorted(self.exact.get(phone, ()))
+
+    def count_prefix(self, prefix): # скільки номерів починається з prefix — без їх перебору
+        return (bisect.bisect_left(self.sorted, (prefix + ":",)) # ":" іде одразу після цифр
+                - bisect.bisect_left(self.sorted, (prefix,)))
+
+    def prefix(self, prefix, limit=None): # пари (номер, ім'я), номер яких починається з prefix
+        result = []
+        for i in range(bisect.bisect_left(self.sorted, (prefix,)), len(self.sorted)):
+            phone, name = self.sorted[i]
+            if not phone.startswith(prefix) or (limit is not None and len(result) >= limit):
+                break
+            result.append((phone, name))
+        return result
+
+class EmailDomainIndex(RecordIndex): # домен email -> контакти
+    fields = ("email",)
+
+    def __init__(self, records):
+        self.domains = {} # домен у нижньому регістрі -> імена (dict як впорядкована множина)
+        self.keys = {}    # ім'я -> домен
+        super().__init__(records)
+
+    def add(self, record):
+        name = record.name.value
+        self.remove(name)
+        if record.email:
+            domain = record.email.value.rsplit("@", 1)[-1].lower()
+            self.keys[name] = domain
+            self.domains.setdefault(domain, {})[name] = None
+
+    def remove(self, name):
+        domain = self.keys.pop(name, None)
+        if domain is not None:
+            names = self.domains[domain]
+            del names[name]
+            if not names:
+                del self.domains[domain]
+
+    def lookup(self, domain):
+        return self.domains.get(domain.lower().lstrip("@"), {})
+
+class AddressIndex(RecordIndex): # пошук підрядка в адресах через індекс триграм
+    fields = ("address",)
+
+    def __init__(self, records):
+        self.trigrams = TrigramIndex()
+        super().__init__(records)
+
+    def add(self, record):
+        name = record.name.value
+        if record.address:
+            self.trigrams.add(name, record.address.value)
+        else:
+            self.trigrams.remove(name)
+
+    def remove(self, name):
+        self.trigrams.remove(name)
+
+class NamePrefixIndex(RecordIndex): # відсортовані імена для пошуку за початком і доповнення
+    names_only = True
+
+    def __init__(self, records):
+        self.sorted = sorted((record.name.value.lower(), record.name.value) for record in records)
+
+    @classmethod
+    def from_names(cls, names): # лише з ключів книги, не розпаковуючи самих записів
+        index = cls.__new__(cls)
+        index.sorted = sorted((name.lower(), name) for name in names)
+        return index
+
+    def add(self, record):
+        self.add_name(record.name.value)
+
+    def add_name(self, name):
+        key = (name.lower(), name)
+        i = bisect.bisect_left(self.sorted, key)
+        if i == len(self.sorted) or self.sorted[i] != key:
+            self.sorted.insert(i, key)
+
+    def remove(self, name):
+        key = (name.lower(), name)
+        i = bisect.bisect_left(self.sorted, key)
+        if i < len(self.sorted) and self.sorted[i] == key:
+            del self.sorted[i]
+
+    def _range(self, prefix):
+        prefix = prefix.lower()
+        return bisect.bisect_left(self.sorted, (prefix,)), bisect.bisect_left(self.sorted, (prefix + "\U0010ffff",))
+
+    def count(self, prefix):
+        start, end = self._range(prefix)
+        return end - start
+
+    def prefix(self, prefix, limit=None): # імена, що починаються з prefix (без урахування регістру), за абеткою
+        start, end = self._range(prefix)
+        if limit is not None:
+            end = min(end, start + limit)
+        return [name for _, name in self.sorted[start:end]]
+
+# Транслітерація кирилиці (українська, плюс кілька російських літер) для нечіткого пошуку
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e", "є": "ie", "ж": "zh",
+    "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n",
+    "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia", "ы": "y", "э": "e",
+    "ё": "io", "ъ": "", "'": "", "’": "", "ʼ": "",
+})
+
+def fuzzy_key(name): # «Марія», «MARIA» і «Mariia» зводяться до близьких латинських ключів
+    return "".join(ch for ch in name.lower().translate(TRANSLIT) if ch.isalnum())
+
+def edit_distance(a, b, limit=None): # відстань Левенштейна; якщо вона більша за limit — повертає limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit: # далі відстань лише зростає
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+DROP_VOWELS = str.maketrans("", "", "aeiouy")
+
+def name_block_key(key): # кістяк приголосних ключа fuzzy_key: «Марія», «Maria», «Mariya» -> «mr»
+    skeleton = key[:1] + key[1:].translate(DROP_VOWELS)
+    return "".join(ch for ch, _ in itertools.groupby(skeleton))
+
+def _dedupe_conflict(a, b): # (ключ, ім'я, email, день народження): обидва поля задані й різні —
+    _, _, email_a, birthday_a = a # схожі імена, але, ймовірно, різні люди
+    _, _, email_b, birthday_b = b # різні телефони не суперечать: під час злиття номери об'єднуються
+    return bool(email_a and email_b and email_a != email_b) or bool(birthday_a and birthday_b and birthday_a != birthday_b)
+
+DEDUPE_NAME_BLOCK_LIMIT = 500 # більші блоки за іменем (надто поширений кістяк) попарно не порівнюємо
+
+def _bigrams(key): # біграми з позначками початку й кінця, щоб короткі імена теж мали їх кілька
+    padded = f"^{key}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+class FuzzyNameIndex(RecordIndex): # індекс біграм транслітерованих імен; кандидати ранжуються відстанню редагування
+    fields = () # ім'я запису не змінюється, тож переіндексація потрібна лише при додаванні та видаленні
+    names_only = True
+
+    def __init__(self, records):
+        self.postings = {} # (довжина ключа, біграма) -> ключі
+        self.names = {}    # ключ -> імена контактів (dict як впорядкована множина)
+        self.keys = {}     # ім'я -> ключ
+        super().__init__(records)
+
+    @classmethod
+    def from_names(cls, names):
+        index = cls(())
+        for name in names:
+            index.add_name(name)
+        return index
+
+    def add(self, record):
+        self.add_name(record.name.value)
+
+    def add_name(self, name):
+        if name in self.keys:
+            return
+        key = self.keys[name] = fuzzy_key(name)
+        if key not in self.names:
+            self.names[key] = {}
+            for gram in _bigrams(key):
+                self.postings.setdefault((len(key), gram), set()).add(key)
+        self.names[key][name] = None
+
+    def remove(self, name):
+        key = self.keys.pop(name, None)
+        if key is None:
+            return
+        names = self.names[key]
+        del names[name]
+        if not names:
+            del self.names[key]
+            for gram in _bigrams(key):
+                keys = self.postings[(len(key), gram)]
+                keys.discard(key)
+                if not keys:
+                    del self.postings[(len(key), gram)]
+
+    def search(self, query, limit=5, max_distance=None): # (відстань, ім'я) найближчих імен
+        key = fuzzy_key(query)
+        if max_distance is None:
+            max_distance = min(3, max(1, len(key) // 3))
+        grams = _bigrams(key)
+        counts = Counter()
+        # відстань не менша за різницю довжин, тож беремо лише ключі близької довжини
+        for length in range(max(0, len(key) - max_distance), len(key) + max_distance + 1):
+            for gram in grams:
+                keys = self.postings.get((length, gram))
+                if keys:
+                    counts.update(keys) # підрахунок спільних біграм виконується на рівні C
+        # кожна правка руйнує щонайбільше дві біграми запиту, тож спільних біграм мало — відстань велика;
+        # кандидатів перевіряємо від найменшої нижньої межі відстані й зупиняємося, щойно межа гірша за k-й результат
+        candidates = sorted(
+            (max((len(grams) - shared + 1) // 2, abs(len(candidate) - len(key))), candidate)
+            for candidate, shared in counts.items()
+            if shared >= len(grams) - 2 * max_distance
+        )
+        found = []
+        cutoff = max_distance
+        for lower_bound, candidate in candidates:
+            if lower_bound > cutoff:
+                break
+            distance = edit_distance(key, candidate, cutoff)
+            if distance <= cutoff:
+                found.extend((distance, name) for name in self.names[candidate])
+                found.sort()
+                if len(found) >= limit:
+                    cutoff = found[limit - 1][0]
+        return found[:limit]
+
+#Потокобезпечний режим книг
+class RWLock: # «багато читачів або один письменник»; письменники мають пріоритет, вкладені входи дозволені
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None # ідентифікатор потоку, що зараз пише
+        self._local = threading.local() # чи тримає поточний потік блокування на читання
+
+    @contextlib.contextmanager
+    def read(self):
+        local = self._local
+        if self._writer == threading.get_ident() or getattr(local, "reading", False): # вкладене читання
+            yield
+            return
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        local.reading = True
+        try:
+            yield
+        finally:
+            local.reading = False
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me: # вкладений запис у тому ж потоці
+            yield
+            return
+        if getattr(self._local, "reading", False):
+            raise RuntimeError("Не можна почати запис, утримуючи блокування на читання")
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+class _NoLock: # заглушка для однопотокового режиму: жодних витрат на блокування
+    _context = contextlib.nullcontext()
+
+    def read(self):
+        return self._context
+
+    def write(self):
+        return self._context
+
+NO_LOCK = _NoLock()
+
 class AddressBook(UserDict):
+    storage = None # SqliteStorage, якщо книга зберігається позаписно
+    _lazy = False # True, поки частина записів є лише у сховищі й ще не завантажена
+    _indexes = None # вид індексу -> RecordIndex; кожен будується при першому зверненні
+    _lock = NO_LOCK # RWLock у потокобезпечному режимі
+    _build_lock = contextlib.nullcontext() # щоб два читачі не будували той самий індекс одночасно
+    _listeners = () # функції listener(ім'я, запис або None), яким книга повідомляє про кожну зміну
+    _transient = ("storage", "_lazy", "_indexes", "_lock", "_build_lock", "_listeners") # атрибути, що не потрапляють у pickle
+
+    def __getstate__(self): # pickle отримує всю книгу, але без з'єднання зі сховищем та індексів
+        self._load_all()
+        state = self.__dict__.copy()
+        for attr in self._transient:
+            state.pop(attr, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for record in self.data.values():
+            record._book = self
+
+    def __missing__(self, name): # запис ще не завантажено — підтягуємо його зі сховища на вимогу
+        record = self.storage.load_record(name) if self._lazy else None
+        if record is None:
+            raise KeyError(name)
+        record._book = self
+        self.data[name] = record
+        return record
+
+    def __contains__(self, name):
+        return name in self.data or (self._lazy and self.storage.has(name))
+
+    def __len__(self):
+        return self.storage.count() if self._lazy else len(self.data)
+
+    def __iter__(self):
+        self._load_all()
+        return iter(self.data)
+
+    def attach_storage(self, storage, lazy=True): # підключає сховище; записи вантажаться за ключем, коли знадобляться
+        self.storage = storage
+        if self.data:
+            storage.save_many(self.data.values())
+        self._lazy = lazy
+        if not lazy:
+            self._load_all(force=True)
+
+    def add_listener(self, listener): # listener(ім'я, запис) після додавання чи зміни, listener(ім'я, None) після видалення
+        self._listeners = (*self._listeners, listener)
+
+    def make_thread_safe(self): # вмикає блокування: пошуки йдуть паралельно, зміни — по одній
+        self._load_all() # ліниве довантаження змінювало б книгу під час читання
+        self._lock = RWLock()
+        self._build_lock = threading.Lock()
+
+    def _load_all(self, force=False): # дочитує зі сховища всі ще не завантажені записи
+        if not (self._lazy or force):
+            return
+        loaded = {} # порядок книги — порядок записів у сховищі, а не порядок звернень до них
+        for record in self.storage.iter_records():
+            name = record.name.value
+            if name in self.data:
+                record = self.data[name]
+            record._book = self
+            loaded[name] = record
+        self.data = loaded
+        self._lazy = False
+
+    def records(self): # усі записи книги (для переліку та пошуку)
+        self._load_all()
+        if self._lock is NO_LOCK:
+            return self.data.values()
+        with self._lock.read(): # знімок: його можна перебирати, поки інші потоки змінюють книгу
+            return list(self.data.values())
+
+    def names(self): # імена всіх записів; лінива книга бере їх зі сховища, не створюючи записів
+        if self._lazy:
+            return self.storage.iter_names()
+        return list(self.data)
+
+    def stream_records(self): # перебирає всі записи, не завантажуючи лінивої книги в пам'ять
+        if not self._lazy:
+            yield from self.records()
+            return
+        for record in self.storage.iter_records():
+            yield self.data.get(record.name.value, record)
+
+    def add_records(self, records): # масове додавання: одна транзакція у сховищі
+        with self._lock.write():
+            for record in records:
+                record._book = self
+                self.data[record.name.value] = record
+            if self.storage is not None:
+                self.storage.save_many(records)
+            if self._indexes and len(records) * 10 > len(self.data):
+                self._indexes = None # великий пакет — дешевше перебудувати індекси при наступному запиті
+            elif self._indexes:
+                for index in self._indexes.values():
+                    for record in records:
+                        index.add(record)
+            for listener in self._listeners:
+                for record in records:
+                    listener(record.name.value, record)
+
+    def _record_changed(self, record, field): # викликається записом після кожної зміни
+        with self._lock.write():
+            if self.data.get(record.name.value) is not record:
+                return # запис тим часом видалили або замінили з іншого потоку
+            if self.storage is not None:
+                self.storage.save_record(record)
+            if self._indexes:
+                for index in self._indexes.values():
+                    if field in index.fields:
+                        index.add(record)
+            for listener in self._listeners:
+                listener(record.name.value, record)
+
+    def _index(self, kind): # індекс заданого класу; будується з усіх записів лише раз
+        index = self._indexes.get(kind) if self._indexes else None
+        if index is None:
+            with self._build_lock:
+                index = self._indexes.get(kind) if self._indexes else None
+                if index is None: # готовий індекс публікуємо новим словником — читачі бачать або старий, або повний
+                    index = kind.from_names(self.names()) if kind.names_only else kind(self.records())
+                    self._indexes = {**(self._indexes or {}), kind: index}
+        return index
+
+    def _phone_index(self): # таблиця phones у SQLite, якщо книга на ній, інакше PhoneIndex у пам'яті
+        phones = getattr(self.storage, "phones", None)
+        return phones if phones is not None else self._index(PhoneIndex)
+
+    def flush(self): # фіксує зміни, якщо сховище працює без автофіксації
+        if self.storage is not None:
+            self.storage.flush()
+
+    def close(self):
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+            self._lazy = False
+
     def add_record(self, record):
-        self.data[record.name.value] = record
+        with self._lock.write():
+            self.data[record.name.value] = record
+            record._book = self
+            if self.storage is not None:
+                self.storage.save_record(record)
+            if self._indexes:
+                for index in self._indexes.values():
+                    index.add(record)
+            for listener in self._listeners:
+                listener(record.name.value, record)
 
     def find(self, name):
-        return self.data.get(name)  
+        with self._lock.read():
+            return self.get(name)
     
     def delete (self, name):
-        if name in self.data:
-            del self.data[name]
+        with self._lock.write():
+            if name in self:
+                self.data.pop(name, None)
+                if self.storage is not None:
+                    self.storage.delete_record(name)
+                if self._indexes:
+                    for index in self._indexes.values():
+                        index.remove(name)
+                for listener in self._listeners:
+                    listener(name, None)
+
+    def fuzzy_find(self, query, limit=5): # (запис, відстань) для імен, схожих на query, з урахуванням транслітерації
+        with self._lock.read():
+            return [(self[name], distance) for distance, name in self._index(FuzzyNameIndex).search(query, limit)]
+
+    def find_by_phone(self, phone): # записи з точно таким номером телефону
+        with self._lock.read():
+            return [self[name] for name in self._phone_index().lookup(phone)]
+
+    def find_by_phone_prefix(self, prefix, limit=None): # пари (номер, запис) для номерів, що починаються з prefix
+        with self._lock.read():
+            return [(phone, self[name]) for phone, name in self._phone_index().prefix(prefix, limit)]
+
+    def complete(self, prefix, limit=10): # перші limit імен, що починаються з prefix
+        with self._lock.read():
+            return self._index(NamePrefixIndex).prefix(prefix, limit)
+
+    def query(self, name_prefix=None, email_domain=None, address=None, phone_prefix=None, birthday_month=None):
+        # Контакти, що задовольняють усі задані умови, за іменем. Планувальник починає з умови,
+        # за якою індекс дає найменше кандидатів, а решту умов або перетинає з індексами,
+        # або (якщо індекс дав би набагато більше) перевіряє безпосередньо на кандидатах.
+        if birthday_month is not None and not 1 <= birthday_month <= 12:
+            raise ValueError("Місяць має бути числом від 1 до 12")
+        with self._lock.read():
+            plan = [] # (оцінка кількості, кандидати з індексу, перевірка одного запису)
+            if name_prefix:
+                names = self._index(NamePrefixIndex)
+                folded = name_prefix.lower()
+                plan.append((names.count(name_prefix), lambda: names.prefix(name_prefix),
+                             lambda record: record.name.value.lower().startswith(folded)))
+            if email_domain:
+                domains = self._index(EmailDomainIndex)
+                domain = email_domain.lower().lstrip("@")
+                plan.append((len(domains.lookup(domain)), lambda: domains.lookup(domain),
+                             lambda record: bool(record.email) and record.email.value.rsplit("@", 1)[-1].lower() == domain))
+            if address:
+                addresses = self._index(AddressIndex).trigrams
+                needle = address.lower()
+                plan.append((addresses.estimate(address), lambda: addresses.search(address),
+                             lambda record: bool(record.address) and needle in record.address.value.lower()))
+            if phone_prefix:
+                phones = self._phone_index()
+                plan.append((phones.count_prefix(phone_prefix), lambda: {name for _, name in phones.prefix(phone_prefix)},
+                             lambda record: any(phone.startswith(phone_prefix) for phone in record.phone_numbers())))
+            if birthday_month is not None:
+                buckets = self._index(BirthdayIndex).month(birthday_month)
+                plan.append((sum(map(len, buckets)), lambda: {name for names in buckets for name in names},
+                             lambda record: bool(record.birthday) and record.birthday.value.month == birthday_month))
+            if not plan:
+                raise ValueError("Вкажи хоча б одну умову пошуку")
+            plan.sort(key=lambda step: step[0])
+            candidates = set(plan[0][1]())
+            for estimate, fetch, check in plan[1:]:
+                if not candidates:
+                    break
+                if estimate <= 4 * len(candidates): # перетин з індексом дешевший за перевірку кожного кандидата
+                    candidates.intersection_update(fetch())
+                else:
+                    candidates = {name for name in candidates if check(self[name])}
+            return [self[name] for name in sorted(candidates, key=str.lower)]
+
+    def find_duplicates(self): # групи імен, схожих на один контакт; відсортовані списки імен
+        # Замість порівняння кожної пари записи розкладаються по блоках: однаковий номер або email —
+        # одразу один контакт; близькі імена порівнюються відстанню редагування лише в межах
+        # спільного кістяка імені (name_block_key) і лише якщо інші поля не суперечать одне одному.
+        with self._lock.read():
+            parent = {}
+
+            def root(name):
+                while parent[name] != name:
+                    parent[name] = parent[parent[name]]
+                    name = parent[name]
+                return name
+
+            first_seen = {} # ("phone", номер) або ("email", адреса) -> перше ім'я з таким значенням
+            name_blocks = {}
+            for record in self.stream_records():
+                name = record.name.value
+                parent[name] = name
+                email = record.email.value.lower() if record.email else None
+                keys = [("phone", number) for number in record._phones]
+                if email:
+                    keys.append(("email", email))
+                for key in keys:
+                    first = first_seen.setdefault(key, name)
+                    if first != name:
+                        parent[root(name)] = root(first)
+                key = fuzzy_key(name)
+                if key:
+                    birthday = record.birthday.value if record.birthday else None
+                    name_blocks.setdefault(name_block_key(key), []).append((key, name, email, birthday))
+            for block in name_blocks.values():
+                if not 1 < len(block) <= DEDUPE_NAME_BLOCK_LIMIT:
+                    continue
+                for i, a in enumerate(block):
+                    for b in block[i + 1:]:
+                        if _dedupe_conflict(a, b): # дешева перевірка полів — перед відстанню редагування
+                            continue
+                        limit = 1 if min(len(a[0]), len(b[0])) < 8 else 2
+                        if edit_distance(a[0], b[0], limit) <= limit:
+                            parent[root(b[1])] = root(a[1])
+            clusters = {}
+            for name in parent:
+                clusters.setdefault(root(name), []).append(name)
+            return sorted((sorted(names, key=str.lower) for names in clusters.values() if len(names) > 1),
+                          key=lambda names: names[0].lower())
+
+    def merge_records(self, names): # зливає записи в перший: телефони об'єднуються, порожні поля заповнюються
+        with self._lock.write():
+            target = self[names[0]]
+            phones = target.phone_numbers()
+            for name in names[1:]:
+                other = self[name]
+                phones += [phone for phone in other.phone_numbers() if phone not in phones]
+                if other.email and not target.email:
+                    target.email = other.email
+                if other.address and not target.address:
+                    target.address = other.address
+                if other.birthday and not target.birthday:
+                    target.birthday = other.birthday
+                self.delete(name)
+            if len(phones) != len(target._phones):
+                target.replace_phones(phones)
+            return target
 
     def get_upcoming_birthdays(self, days: int = 7): # Метод для отримання днів народження, що наближаються
+        # Переглядаємо лише кошики днів із вікна, а не всю книгу; результати йдуть за датою
         today = datetime.today().date()
-        upcoming = []
-
-        for record in self.data.values():
+        with self._lock.read():
+            index = self._index(BirthdayIndex)
+            return [self.data[name] for _, name in index.upcoming(today, days)]
+
+#Нагадування про дні народження
+REMINDER_TIME = datetime.min.time().replace(hour=9) # о котрій надсилати нагадування; strptime тут тягнув би re під час імпорту
+REMINDER_MAX_SLEEP = 3600 # найдовше очікування між звірками з годинником (сон комп'ютера, переведення часу)
+
+def next_birthday(birthday, today): # найближче святкування не раніше today; 29.02 у невисокосний рік — 28.02
+    for year in (today.year, today.year + 1):
+        day = 28 if (birthday.month, birthday.day) == (2, 29) and not _is_leap(year) else birthday.day
+        occurrence = birthday.replace(year=year, day=day)
+        if occurrence >= today:
+            return occurrence
+
+class BirthdayReminders: # купа (дата нагадування, ім'я): потік спить до найближчої дати, а не переглядає книгу
+    def __init__(self, book, notify=print, days_before=0, clock=datetime.now):
+        import heapq
+        self.notify = notify           # notify(текст) — stdout, файл або будь-який інший обробник
+        self.days_before = days_before # за скільки днів попереджати
+        self.clock = clock
+        self.birthdays = {} # ім'я -> дата народження
+        self.due = {}       # ім'я -> дата нагадування; записи купи з іншою датою застаріли й пропускаються
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event() # будить потік, коли з'являється раніше нагадування або час зупинитися
+        self._stopped = False
+        self._thread = None
+        today = clock().date()
+        due_by_day = {} # дата нагадування залежить лише від дня й місяця — рахуємо її раз на день року
+        for record in book.stream_records():
             if record.birthday:
-                bday = record.birthday.value
-                bday_this_year = bday.replace(year=today.year).date()
-
-                if bday_this_year < today:
-                    bday_this_year = bday_this_year.replace(year=today.year + 1)
-
-                delta = (bday_this_year - today).days
-                if 0 <= delta <= days:
-                    upcoming.append(record)
-
-        return upcoming
+                name = record.name.value
+                birthday = self.birthdays[name] = record.birthday.value.date()
+                day = (birthday.month, birthday.day)
+                due = due_by_day.get(day)
+                if due is None:
+                    due = due_by_day[day] = self._next_due(birthday, today)
+                self.due[name] = due
+        self.heap = [(due, name) for name, due in self.due.items()]
+        heapq.heapify(self.heap)
+        book.add_listener(self.update)
+
+    def _next_due(self, birthday, today): # дата нагадування про найближче святкування; якщо вже пізно — today
+        return max(today, next_birthday(birthday, today) - timedelta(days=self.days_before))
+
+    def update(self, name, record): # слухач книги: додавання, зміна чи видалення одного запису
+        import heapq
+        birthday = record.birthday.value.date() if record is not None and record.birthday else None
+        with self._lock:
+            if birthday == self.birthdays.get(name):
+                return
+            if birthday is None:
+                del self.birthdays[name], self.due[name] # запис у купі стане застарілим
+                return
+            self.birthdays[name] = birthday
+            due = self.due[name] = self._next_due(birthday, self.clock().date())
+            if len(self.heap) > 2 * len(self.due) + 64: # застарілих записів забагато — перебудовуємо купу
+                self.heap = [(due, name) for name, due in self.due.items()]
+                heapq.heapify(self.heap)
+            else:
+                heapq.heappush(self.heap, (due, name))
+            if self.heap[0] == (due, name):
+                self._wakeup.set()
+
+    def message(self, name, due):
+        birthday = self.birthdays[name]
+        occurrence = next_birthday(birthday, due)
+        when = "сьогодні" if occurrence == due else f"{occurrence:%d.%m} (через {(occurrence - due).days} дн.)"
+        return f"🎂 {name}: день народження {when}, виповнюється {occurrence.year - birthday.year}"
+
+    def _pop_due(self): # нагадування, час яких настав, і скільки секунд спати до наступного
+        import heapq
+        now = self.clock()
+        today = now.date()
+        messages = []
+        with self._lock:
+            while self.heap and datetime.combine(self.heap[0][0], REMINDER_TIME) <= now:
+                due, name = heapq.heappop(self.heap)
+                if self.due.get(name) != due:
+                    continue
+                birthday = self.birthdays[name]
+                messages.append(self.message(name, due))
+                after = max(next_birthday(birthday, due), today) + timedelta(days=1) # наступне — вже на той рік
+                due = self.due[name] = self._next_due(birthday, after)
+                heapq.heappush(self.heap, (due, name))
+            timeout = REMINDER_MAX_SLEEP
+            if self.heap:
+                timeout = min(timeout, (datetime.combine(self.heap[0][0], REMINDER_TIME) - now).total_seconds())
+        return messages, max(timeout, 0)
+
+    def run(self): # цикл планувальника; між нагадуваннями потік лише чекає на подію
+        while not self._stopped:
+            messages, timeout = self._pop_due()
+            for text in messages:
+                self.notify(text)
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def start(self): # запускає планувальник у фоновому потоці
+        self._thread = threading.Thread(target=self.run, name="birthday-reminders", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def reminder_output(filename=None): # куди надсилати нагадування: stdout або дописувати у файл
+    if filename is None:
+        return lambda text: print(text, flush=True)
+    def append(text):
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now():%Y-%m-%d %H:%M} {text}\n")
+    return append
 
 #  класс Notes
 class NotesName(Field): # клас для назви нотатки
+    __slots__ = ()
+
     def __init__(self, value):
         if not value or not isinstance(value, str):
             raise ValueError("Назва нотатки має бути непорожнім рядком.")
         super().__init__(value)
 
 class NoteText(Field): # клас для тексту нотатк
+    __slots__ = ()
+
     def __init__(self, value):
         if not value or not isinstance(value, str):
             raise ValueError("Текст нотатки має бути непорожнім рядком.")
         super().__init__(value)
 
 class TagNotes(Field): # клас для тегів нотаток
+    __slots__ = ()
+
     def __init__(self, value):
         if value and not isinstance(value, str):
             raise ValueError("Тег має бути рядком.")
@@ -144,14 +1551,28 @@ class TagNotes(Field): # клас для тегів нотаток
         super().__init__(value)
 
 class NoteRecord: # клас для запису нотатки
+    wrap_width = 50 # ширина переносу тексту при виведенні (параметр --width)
+
     def __init__(self, name, text, tag=None):
         self.name = NotesName(name)
         self.text = NoteText(text)
         self.tag = TagNotes(tag) if tag else None
 
+    def __setattr__(self, attr, value): # будь-яка зміна полів (edit_text, edit_name) скидає кеш виведення
+        object.__setattr__(self, attr, value)
+        object.__setattr__(self, "_rendered", None)
+
     def __str__(self): # метод для виведення нотатки у зручному форматі
-        tag_display = f" [tag: {self.tag.value}]" if self.tag else ""
-        return f"📌 Note: {self.name.value}\n{textwrap.fill(self.text.value, width=50)}{tag_display}\n"
+        import textwrap
+        cache = self.__dict__.get("_rendered") # [ширина, текст]; див. Record._render_cache
+        if cache is None:
+            cache = [None, None]
+            object.__setattr__(self, "_rendered", cache)
+        if cache[0] != self.wrap_width:
+            tag_display = f" [tag: {self.tag.value}]" if self.tag else ""
+            cache[1] = f"📌 Note: {self.name.value}\n{textwrap.fill(self.text.value, width=self.wrap_width)}{tag_display}\n"
+            cache[0] = self.wrap_width
+        return cache[1]
 
     def to_dict(self): # метод для перетворення нотатки у словник для збереження у JSON
         """Повертає словник для JSON-серіалізації."""
@@ -165,61 +1586,985 @@ class NoteRecord: # клас для запису нотатки
     def from_dict(cls, data):
         return cls(data["name"], data["text"], data.get("tag"))
 
+    @classmethod
+    def restore(cls, data): # нотатка з уже перевіреного знімка, без повторної перевірки полів
+        note = cls.__new__(cls)
+        note.name = NotesName.restore(data["name"])
+        note.text = NoteText.restore(data["text"])
+        note.tag = TagNotes.restore(data["tag"]) if data.get("tag") else None
+        return note
+
+JOURNAL_COMPACT_BYTES = 1_000_000 # розмір журналу, після якого нотатки ущільнюються у новий знімок
+
+def _cut_torn_line(log_name): # недописаний останній рядок після збою відрізаємо, щоб новий запис не склеївся з ним
+    import json
+    try:
+        with open(log_name, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            start = end
+            while start > 0: # шукаємо останній "\n" з кінця, по 4 КБ
+                step = min(start, 4096)
+                f.seek(start - step)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    start += newline + 1 - step
+                    break
+                start -= step
+            if start == end:
+                return
+            f.seek(start)
+            try:
+                json.loads(f.read())
+            except ValueError:
+                f.truncate(start)
+            else: # запис цілий, бракує лише "\n" — _replay його вже застосував
+                f.seek(end)
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+class NotesJournal: # журнал змін нотаток (write-ahead log): кожна зміна — один рядок JSON у кінці файлу
+    def __init__(self, book, filename="notes.json", threshold=JOURNAL_COMPACT_BYTES, autoflush=True):
+        self.book = book
+        self.autoflush = autoflush # False — записи буферизуються до flush() (пакетний режим)
+        self.filename = filename # файл знімка (звичайний notes.json)
+        self.log_name = filename + ".log" # активний журнал
+        self.frozen_name = filename + ".log.1" # журнал, що саме ущільнюється у знімок
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._compactor = None
+        if os.path.exists(self.frozen_name): # попереднє ущільнення не завершилось — дописуємо знімок зараз
+            book.save(filename)
+            os.remove(self.frozen_name)
+            open(self.log_name, "w", encoding="utf-8").close()
+        _cut_torn_line(self.log_name)
+        self._file = open(self.log_name, "a", encoding="utf-8")
+
+    def put(self, record: "NoteRecord"): # запис нотатки цілком (додавання або редагування)
+        self._append({"op": "put", "note": record.to_dict()})
+
+    def delete(self, name): # видалення нотатки
+        self._append({"op": "del", "name": name})
+
+    def _append(self, entry):
+        import json
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            if self.autoflush:
+                self._file.flush()
+            if self._file.tell() >= self.threshold and self._compactor is None:
+                self._start_compaction()
+
+    def _start_compaction(self): # викликається під self._lock
+        # Лише зріз посилань, кодування — у потоці ущільнення. Навіть якщо нотатку змінять під час
+        # запису знімка, ці зміни вже є в новому журналі й перезапишуть її при завантаженні.
+        snapshot = self.book._snapshot()
+        self._file.close()
+        os.replace(self.log_name, self.frozen_name)
+        self._file = open(self.log_name, "a", encoding="utf-8")
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot,), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot):
+        self.book._write_snapshot(self.filename, snapshot)
+        os.remove(self.frozen_name)
+        with self._lock:
+            self._compactor = None
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self): # дочікуємося фонового ущільнення та закриваємо журнал
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        self._file.close()
+
+def _write_json_atomic(filename, data): # пише JSON у тимчасовий файл і атомарно підміняє ним основний
+    import json
+    tmp_name = filename + ".tmp"
+    with open(tmp_name, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_name, filename)
+
+#Знімок нотаток з індексом зміщень: тексти читаються з відображеного в пам'ять файлу лише на вимогу
+NOTES_CACHE_SIZE = 1024 # скільки розпакованих нотаток тримати в пам'яті (LRU)
+
+def _notes_index_name(filename): # notes.json -> notes.idx
+    return os.path.splitext(filename)[0] + ".idx"
+
+def _note_json(note): # один рядок знімка
+    import json
+    return json.dumps(note.to_dict(), ensure_ascii=False).encode()
+
+def write_mapped_notes(filename, entries): # entries — пари (назва, рядок JSON у байтах); пише нове покоління знімка
+    import json
+    index_name = _notes_index_name(filename)
+    base = os.path.splitext(os.path.basename(filename))[0]
+    folder = os.path.dirname(index_name)
+    try:
+        with open(index_name, encoding="utf-8") as f:
+            generation = json.load(f)["generation"] + 1
+    except FileNotFoundError:
+        generation = 1
+    data_name = f"{base}.{generation}.dat" # новий файл щоразу: старий може бути ще відображений у пам'ять
+    names, offsets = [], [0]
+    with open(os.path.join(folder, data_name), "wb") as f:
+        for name, body in entries:
+            f.write(body + b"\n")
+            names.append(name)
+            offsets.append(f.tell())
+        f.flush()
+        os.fsync(f.fileno())
+    _write_json_atomic(index_name, {"version": 1, "generation": generation, "data": data_name,
+                                    "names": names, "offsets": offsets}) # знімок стає чинним лише тут
+    for entry in os.scandir(folder or "."): # лише файли попередніх поколінь, що ще лежать у теці
+        generation_part = entry.name[len(base) + 1:-len(".dat")]
+        if (entry.name.startswith(base + ".") and entry.name.endswith(".dat") and generation_part.isdigit()
+                and int(generation_part) < generation):
+            with contextlib.suppress(OSError): # на Windows відображений файл видалиться вже наступного разу
+                os.remove(entry.path)
+
+def _open_mapped_notes(index_name): # (назви, зміщення, mmap або None) покоління, записаного в індексі
+    import json
+    import mmap
+    with open(index_name, encoding="utf-8") as f:
+        info = json.load(f)
+    offsets = array("Q", info["offsets"])
+    data = None
+    if offsets[-1]:
+        with open(os.path.join(os.path.dirname(index_name), info["data"]), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return info["names"], offsets, data
+
+class MappedNotes(MutableMapping): # NotesBook.data поверх знімка: у пам'яті лише назви, зміщення та LRU нотаток
+    def __init__(self, index_name, cache_size=NOTES_CACHE_SIZE):
+        self.index_name = index_name
+        names, self._offsets, self._map = _open_mapped_notes(index_name)
+        self._positions = {name: i for i, name in enumerate(names)} # назва -> номер у знімку; -1 — лише в пам'яті
+        self._changed = {}  # нотатки, додані або змінені після знімка (вони є лише в журналі)
+        self._versions = {} # назва -> номер останньої зміни; за ним remap знає, чи нотатку змінили після зрізу
+        self._serial = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock() # ущільнення перемикає покоління з іншого потоку, а кеш змінюється навіть під час читання
+        self.cache_size = cache_size
+
+    def _raw(self, i): # рядок JSON нотатки без символу нового рядка (викликається під self._lock)
+        return self._map[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def __getitem__(self, name):
+        import json
+        with self._lock:
+            note = self._changed.get(name)
+            if note is None:
+                note = self._cache.get(name)
+            if note is not None:
+                if name in self._cache:
+                    self._cache.move_to_end(name)
+                return note
+            raw = self._raw(self._positions[name])
+        note = NoteRecord.restore(json.loads(raw))
+        with self._lock:
+            if name not in self._changed: # поки розбирали, нотатку могли змінити
+                self._cache[name] = note
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return note
+
+    def __setitem__(self, name, note):
+        with self._lock:
+            self._positions.setdefault(name, -1) # нова назва — в кінець, наявна лишається на своєму місці, як у dict
+            self._changed[name] = note
+            self._serial += 1
+            self._versions[name] = self._serial
+            self._cache.pop(name, None)
+
+    def __delitem__(self, name):
+        with self._lock:
+            del self._positions[name]
+            self._changed.pop(name, None)
+            self._versions.pop(name, None)
+            self._cache.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def snapshot(self): # зріз для write_mapped_notes: лише посилання, без кодування (воно — у потоці ущільнення)
+        with self._lock:
+            return MappedSnapshot(self)
+
+    def remap(self, snapshot): # знімок записано: відображаємо нове покоління і звільняємо пам'ять від того, що в ньому є
+        names, offsets, data = _open_mapped_notes(self.index_name)
+        written = {name: i for i, name in enumerate(names)}
+        with self._lock:
+            self._positions = {name: written.get(name, -1) for name in self._positions}
+            for name, version in snapshot.versions.items():
+                if self._versions.get(name) == version: # після зрізу нотатку не чіпали — тепер вона є у файлі
+                    del self._changed[name], self._versions[name]
+            self._offsets, self._map = offsets, data # старе відображення закриється, щойно його відпустить останній зріз
+            self._cache.clear() # номери нотаток у знімку змінилися
+
+class MappedSnapshot: # зріз MappedNotes: порядок назв, змінені нотатки та відображення, з якого копіюються решта
+    def __init__(self, notes): # викликається під замком notes
+        self.positions = list(notes._positions.items())
+        self.changed = dict(notes._changed)
+        self.versions = {name: notes._versions[name] for name in self.changed}
+        self._map, self._offsets = notes._map, notes._offsets
+
+    def __iter__(self): # пари (назва, рядок JSON); незмінені нотатки копіюються з файлу як є, без розбору
+        for name, i in self.positions:
+            note = self.changed.get(name)
+            if note is not None:
+                yield name, _note_json(note)
+            else:
+                yield name, self._map[self._offsets[i]:self._offsets[i + 1] - 1]
+
+def _trigrams(text): # усі підрядки довжиною 3
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex: # інвертований індекс триграм: швидкий пошук підрядка без урахування регістру
+    def __init__(self):
+        self.postings = {} # триграма -> множина ключів, у тексті яких вона є
+        self.texts = {}    # ключ -> текст у нижньому регістрі (для перевірки кандидатів)
+
+    def add(self, key, text):
+        self.remove(key)
+        text = text.lower()
+        self.texts[key] = text
+        for gram in _trigrams(text):
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        for gram in _trigrams(text):
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def estimate(self, query): # верхня межа кількості збігів: найкоротший список триграм запиту
+        grams = _trigrams(query.lower())
+        return min((len(self.postings.get(gram, ())) for gram in grams), default=len(self.texts))
+
+    def search(self, query): # ключі, текст яких містить query (як `query.lower() in text.lower()`)
+        query = query.lower()
+        grams = _trigrams(query)
+        if not grams: # запит коротший за 3 символи — перевіряємо всі тексти, але вже без lower()
+            candidates = self.texts
+        else:
+            candidates = None
+            for keys in sorted((self.postings.get(gram, ()) for gram in grams), key=len):
+                candidates = set(keys) if candidates is None else candidates & keys
+                if not candidates:
+                    return set()
+        return {key for key in candidates if query in self.texts[key]}
+
+class NotesIndex: # індекси книги нотаток: за назвою, текстом і тегом
+    def __init__(self, notes):
+        self.positions = {} # назва -> порядковий номер, щоб видавати результати в порядку книги
+        self._next_position = 0
+        self.names = TrigramIndex()
+        self.texts = TrigramIndex()
+        self.note_tags = {}   # назва нотатки -> її тег
+        self.tags = {}        # тег у нижньому регістрі -> назви нотаток (dict як впорядкована множина)
+        self.tag_counts = {}  # тег як його ввели -> кількість нотаток
+        self.sorted_tags = [] # відсортований реєстр різних тегів: (тег.lower(), тег)
+        for note in notes:
+            self.add(note)
+
+    def add(self, note): # додає нотатку або переіндексовує наявну з тією ж назвою
+        name = note.name.value
+        if name not in self.positions: # як і у dict, наявний ключ зберігає своє місце
+            self.positions[name] = self._next_position
+            self._next_position += 1
+        self.names.add(name, name)
+        self.texts.add(name, note.text.value)
+        tag = note.tag.value if note.tag else None
+        if self.note_tags.get(name) != tag:
+            self._remove_tag(name)
+            if tag:
+                self._add_tag(name, tag)
+
+    def remove(self, name):
+        self.positions.pop(name, None)
+        self.names.remove(name)
+        self.texts.remove(name)
+        self._remove_tag(name)
+
+    def _add_tag(self, name, tag):
+        self.note_tags[name] = tag
+        self.tags.setdefault(tag.lower(), {})[name] = None
+        count = self.tag_counts.get(tag, 0)
+        if not count:
+            bisect.insort(self.sorted_tags, (tag.lower(), tag))
+        self.tag_counts[tag] = count + 1
+
+    def _remove_tag(self, name):
+        tag = self.note_tags.pop(name, None)
+        if tag is None:
+            return
+        names = self.tags[tag.lower()]
+        del names[name]
+        if not names:
+            del self.tags[tag.lower()]
+        self.tag_counts[tag] -= 1
+        if not self.tag_counts[tag]:
+            del self.tag_counts[tag]
+            del self.sorted_tags[bisect.bisect_left(self.sorted_tags, (tag.lower(), tag))]
+
+    def ordered(self, names):
+        return sorted(names, key=self.positions.__getitem__)
+
 class NotesBook(UserDict): # клас для книги нотаток, що наслідує UserDict
-    def add_note(self, record: NoteRecord): # клас для додавання нотатки
+    journal = None # NotesJournal, якщо увімкнено журнал; інакше зберігаємо лише через save()
+    _index = None # NotesIndex; будується під час першого пошуку і далі оновлюється з кожною зміною
+    _lock = NO_LOCK # RWLock у потокобезпечному режимі
+    _build_lock = contextlib.nullcontext()
+    _shards = None # ShardedStore, якщо книгу збережено у шарди; відстежує змінені шарди
+    _names = None # NamePrefixIndex назв для доповнення; будується під час першого доповнення
+
+    def make_thread_safe(self): # вмикає блокування: пошуки йдуть паралельно, зміни — по одній
+        self._lock = RWLock()
+        self._build_lock = threading.Lock()
+
+    def _store(self, record): # кладе нотатку в книгу та в індекси, без запису в журнал
         self.data[record.name.value] = record
+        if self._index is not None:
+            self._index.add(record)
+        if self._names is not None:
+            self._names.add_name(record.name.value)
+        if self._shards is not None:
+            self._shards.mark(record.name.value)
+
+    def _discard(self, name):
+        del self.data[name]
+        if self._index is not None:
+            self._index.remove(name)
+        if self._names is not None:
+            self._names.remove(name)
+        if self._shards is not None:
+            self._shards.forget(name)
+
+    def _get_index(self): # на знімку перша побудова розпаковує всі нотатки, а індекс лишається в пам'яті
+        if self._index is None:
+            with self._build_lock:
+                if self._index is None:
+                    self._index = NotesIndex(self.data.values())
+        return self._index
+
+    def complete(self, prefix, limit=10): # перші limit назв нотаток, що починаються з prefix
+        with self._lock.read():
+            if self._names is None:
+                with self._build_lock:
+                    if self._names is None:
+                        self._names = NamePrefixIndex.from_names(self.data)
+            return self._names.prefix(prefix, limit)
+
+    def records(self): # усі нотатки (для переліку та експорту)
+        if self._lock is NO_LOCK:
+            return self.data.values()
+        with self._lock.read(): # знімок: його можна перебирати, поки інші потоки змінюють книгу
+            return list(self.data.values())
+
+    def add_notes(self, records): # масове додавання нотаток (імпорт)
+        with self._lock.write():
+            if self._index is not None and len(records) * 10 > len(self.data):
+                self._index = None # великий пакет — дешевше перебудувати індекси при наступному пошуку
+            for record in records:
+                self.add_note(record)
+
+    def add_note(self, record: NoteRecord): # клас для додавання нотатки
+        with self._lock.write():
+            self._store(record)
+            if self.journal:
+                self.journal.put(record)
 
     def delete_note(self, name): # клас для видалення нотатки
-        if name in self.data:
-            del self.data[name]
-            return True
-        return False
+        with self._lock.write():
+            if name in self.data:
+                self._discard(name)
+                if self.journal:
+                    self.journal.delete(name)
+                return True
+            return False
+
+    def rename_note(self, old_name, new_name): # змінює назву нотатки (ключ у книзі)
+        with self._lock.write():
+            note = self.data[old_name]
+            self._discard(old_name)
+            note.name = NotesName(new_name)
+            self._store(note)
+            if self.journal:
+                self.journal.delete(old_name)
+                self.journal.put(note)
+
+    def edit_note_text(self, name, new_text): # змінює текст нотатки
+        with self._lock.write():
+            note = self.data[name]
+            note.text = NoteText(new_text)
+            self._store(note)
+            if self.journal:
+                self.journal.put(note)
 
     def search_by_name(self, name): # клас для пошуку нотатки за назвою
-        return [note for key, note in self.data.items() if name.lower() in key.lower()]
+        with self._lock.read():
+            index = self._get_index()
+            return [self.data[key] for key in index.ordered(index.names.search(name))]
 
     def search_by_text(self, text): # клас для пошуку нотатки за текстом
-        return [note for note in self.data.values() if text.lower() in note.text.value.lower()]
+        with self._lock.read():
+            index = self._get_index()
+            return [self.data[key] for key in index.ordered(index.texts.search(text))]
 
     def search_by_tag(self, tag): # клас для пошуку нотатки за тегом
-        return [note for note in self.data.values() if note.tag and tag.lower() == note.tag.value.lower()]
+        with self._lock.read():
+            index = self._get_index()
+            return [self.data[key] for key in index.ordered(index.tags.get(tag.lower(), ()))]
+
+    def sorted_tags(self): # усі різні теги в алфавітному порядку (реєстр уже відсортований)
+        with self._lock.read():
+            return [tag for _, tag in self._get_index().sorted_tags]
+
+    def tag_counts(self): # пари (тег, кількість нотаток) в алфавітному порядку — для хмари тегів
+        with self._lock.read():
+            index = self._get_index()
+            return [(tag, index.tag_counts[tag]) for _, tag in index.sorted_tags]
 
     def get_all_notes(self): # клас для отримання всіх нотаток
-        return list(self.data.values())
+        return list(self.records())
 
     def to_list(self): # перетворює нотатки у список словників для збереження у JSON
-        return [record.to_dict() for record in self.data.values()]
+        return [record.to_dict() for record in self.records()]
 
-    def save(self, filename="notes.json"): # Зберігає нотатки у JSON-файл
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(self.to_list(), f, ensure_ascii=False, indent=2)
+    def _snapshot(self): # стан для запису знімка (у журналі викликається під його замком)
+        if isinstance(self.data, MappedNotes):
+            return self.data.snapshot()
+        return list(self.data.values())
 
-    def load(self, filename="notes.json"): # Завантажує нотатки з JSON-файлу
+    def _write_snapshot(self, filename, snapshot):
+        if isinstance(self.data, MappedNotes):
+            write_mapped_notes(filename, snapshot)
+            if _notes_index_name(filename) == self.data.index_name: # книга переходить на нове покоління
+                self.data.remap(snapshot)
+        else:
+            _write_json_atomic(filename, [note.to_dict() for note in snapshot])
+
+    def save(self, filename="notes.json"): # Зберігає нотатки у JSON-файл (або у знімок з індексом, якщо книга на ньому)
+        self._write_snapshot(filename, self._snapshot())
+
+    def save_binary(self, filename="notes.snap", compression="zlib"): # компактний бінарний знімок (write_snapshot)
+        write_snapshot(filename, "notes", self.records(), compression)
+
+    def save_shards(self, directory="notes.shards", shards=DEFAULT_SHARDS, workers=None): # повторне збереження пише лише змінені шарди
+        if self._shards is None:
+            self._shards = ShardedStore(directory, "notes", shards, workers)
+            for name in self.data:
+                self._shards.mark(name)
+        return self._shards.save(self.data.__getitem__)
+
+    def load_shards(self, directory="notes.shards", workers=None): # шарди читаються паралельно й зливаються в одну книгу
+        self._shards = ShardedStore(directory, "notes", workers=workers)
+        for name, (_, text, tag) in self._shards.load():
+            self.data[name] = NoteRecord.restore({"name": name, "text": text, "tag": tag})
+        self._index = self._names = None
+
+    def use_mapped_storage(self, filename="notes.json"): # переносить книгу у знімок з індексом; журнали вже враховано
+        write_mapped_notes(filename, ((name, _note_json(note)) for name, note in self.data.items()))
+        for log_name in (filename + ".log.1", filename + ".log"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(log_name)
+        self.data = MappedNotes(_notes_index_name(filename))
+
+    def load(self, filename="notes.json"): # Завантажує нотатки (знімок з індексом, бінарний знімок або JSON) та дочитує журнали змін
+        import json
+        index_name = _notes_index_name(filename)
+        if os.path.exists(index_name) and not is_snapshot_file(filename): # лише назви та зміщення; нотатки розпаковуються при зверненні
+            self.data = MappedNotes(index_name)
+            for log_name in (filename + ".log.1", filename + ".log"):
+                self._replay(log_name)
+            return
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                notes_list = json.load(f)
-            for note_data in notes_list:
-                record = NoteRecord.from_dict(note_data)
-                self.add_note(record)
+            with open(filename, "rb") as f:
+                if is_snapshot(f):
+                    for record in read_snapshot(f, "notes"):
+                        self._store(record)
+                else:
+                    for note_data in json.load(f):
+                        self._store(NoteRecord.from_dict(note_data))
         except FileNotFoundError:
             pass  # Файл уперше не знайдено — працюємо з порожньою книгою
+        for log_name in (filename + ".log.1", filename + ".log"):
+            self._replay(log_name)
+
+    def _replay(self, log_name): # застосовує записи журналу поверх знімка
+        import json
+        try:
+            with open(log_name, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break # недописаний останній рядок після збою — далі нічого немає
+                    if entry["op"] == "put":
+                        self._store(NoteRecord.from_dict(entry["note"]))
+                    elif entry["op"] == "del" and entry["name"] in self.data:
+                        self._discard(entry["name"])
+        except FileNotFoundError:
+            pass
+
+    def open_journal(self, filename="notes.json", threshold=JOURNAL_COMPACT_BYTES, autoflush=True): # вмикає журнал: кожна зміна дописується у кінець файлу
+        self.journal = NotesJournal(self, filename, threshold, autoflush)
+
+    def flush(self): # скидає буферизовані записи журналу на диск (або переписує змінені шарди)
+        if self.journal:
+            self.journal.flush()
+        if self._shards is not None:
+            self._shards.save(self.data.__getitem__)
+
+    def close_journal(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def close(self): # як AddressBook.close(): зберегти все й завершити роботу з книгою
+        self.close_journal()
+        if self._shards is not None:
+            self._shards.save(self.data.__getitem__)
+
+#Масовий імпорт та експорт (CSV або JSONL, потоково)
+BULK_CHUNK_SIZE = 10_000 # рядків, що перевіряються та додаються за раз
+MAX_REPORTED_ERRORS = 20
+
+CONTACT_COLUMNS = ("name", "phones", "email", "address", "birthday") # у CSV телефони розділяються «;»
+NOTE_COLUMNS = ("name", "text", "tag")
+
+def bulk_format(filename): # формат файлу за розширенням
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".json"):
+        return "jsonl"
+    if extension == ".snap":
+        return "snapshot"
+    raise ValueError(f"Невідомий формат файлу '{filename}'. Підтримуються .csv, .jsonl та .snap")
+
+def read_rows(filename, kind): # генератор (номер рядка, словник полів або текст помилки)
+    import csv
+    import json
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        if bulk_format(filename) == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except ValueError as e:
+                        yield line_no, f"некоректний JSON: {e}"
+            return
+        reader = csv.DictReader(f)
+        for row in reader:
+            data = {key: value or None for key, value in row.items() if key}
+            if kind == "contacts":
+                data["phones"] = [p.strip() for p in (data.get("phones") or "").split(";") if p.strip()]
+            yield reader.line_num, data
+
+def validate_rows(kind, rows): # будує записи через звичайні конструктори; помилки збирає, а не зупиняється
+    build = Record.from_dict if kind == "contacts" else NoteRecord.from_dict
+    records, errors = [], []
+    for line_no, data in rows:
+        if isinstance(data, str):
+            errors.append((line_no, data))
+            continue
+        try:
+            records.append(build(data))
+        except KeyError as e:
+            errors.append((line_no, f"немає поля {e}"))
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append((line_no, str(e)))
+    return records, errors
+
+def import_file(book, filename, kind, workers=None): # потоковий імпорт; повертає (кількість, помилки)
+    import functools
+    import multiprocessing
+    if bulk_format(filename) == "snapshot":
+        return import_snapshot(book, filename, kind), []
+    rows = read_rows(filename, kind)
+    chunks = iter(lambda: list(itertools.islice(rows, BULK_CHUNK_SIZE)), [])
+    validate = functools.partial(validate_rows, kind)
+    pool = multiprocessing.Pool(workers) if workers and workers > 1 else None
+    imported, errors = 0, []
+    try:
+        for records, chunk_errors in (pool.imap(validate, chunks) if pool else map(validate, chunks)):
+            if kind == "contacts":
+                book.add_records(records)
+            else:
+                book.add_notes(records)
+            imported += len(records)
+            errors.extend(chunk_errors)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        book.flush()
+    return imported, errors
+
+def import_snapshot(book, filename, kind): # бінарний знімок (export у .snap): записи вже перевірені, додаємо блоками
+    imported = 0
+    try:
+        with open(filename, "rb") as f:
+            if not is_snapshot(f):
+                raise ValueError(f"Файл '{filename}' не є знімком Snaky sisters")
+            records = read_snapshot(f, kind)
+            for chunk in iter(lambda: list(itertools.islice(records, BULK_CHUNK_SIZE)), []):
+                if kind == "contacts":
+                    book.add_records(chunk)
+                else:
+                    book.add_notes(chunk)
+                imported += len(chunk)
+    finally:
+        book.flush()
+    return imported
+
+def export_file(book, filename, kind): # потоковий експорт; повертає кількість записів
+    import csv
+    import json
+    records = book.stream_records() if kind == "contacts" else iter(book.records())
+    columns = CONTACT_COLUMNS if kind == "contacts" else NOTE_COLUMNS
+    file_format = bulk_format(filename)
+    if file_format == "snapshot":
+        return write_snapshot(filename, kind, records)
+    count = 0
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns) if file_format == "csv" else None
+        if writer:
+            writer.writeheader()
+        for record in records:
+            data = record.to_dict()
+            if writer:
+                if kind == "contacts":
+                    data["phones"] = ";".join(data["phones"])
+                writer.writerow(data)
+            else:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def parse_bulk_args(args): # `import [файл] [--workers N]`
+    if not args:
+        raise IndexError
+    filename, workers = args[0], None
+    if len(args) >= 3 and args[1] == "--workers":
+        workers = int(args[2])
+    return filename, workers
+
+def import_report(imported, errors):
+    lines = [f"📥 Імпортовано записів: {imported}."]
+    if errors:
+        lines.append(f"⚠️  Рядків з помилками: {len(errors)}")
+        lines += [f"  рядок {line_no}: {message}" for line_no, message in errors[:MAX_REPORTED_ERRORS]]
+        if len(errors) > MAX_REPORTED_ERRORS:
+            lines.append(f"  ... і ще {len(errors) - MAX_REPORTED_ERRORS}")
+    return "\n".join(lines)
+
+#Виведення довгих списків
+DEFAULT_PAGE_SIZE = 20 # записів на сторінку для --page та --pager
+PAGE_BREAK = object() # позначка кінця екрана в режимі пейджера
+
+def parse_listing_options(args): # розбирає `all --page N --size K --limit L --pager`
+    options = {"page": None, "size": DEFAULT_PAGE_SIZE, "limit": None, "pager": False}
+    args = list(args)
+    while args:
+        option = args.pop(0)
+        if option == "--pager":
+            options["pager"] = True
+        elif option in ("--page", "--size", "--limit") and args:
+            value = int(args.pop(0))
+            if value < 1:
+                raise ValueError(f"{option} має бути додатним числом")
+            options[option[2:]] = value
+        else:
+            raise ValueError(f"Невідомий параметр: {option}. Приклад: all --page 2 --size 20")
+    return options
+
+def paginate(chunks, page=None, size=DEFAULT_PAGE_SIZE, limit=None, pager=False): # ліниво вибирає потрібну частину потоку
+    if page is not None:
+        chunks = itertools.islice(chunks, (page - 1) * size, page * size)
+    if limit is not None:
+        chunks = itertools.islice(chunks, limit)
+    if not pager:
+        yield from chunks
+        return
+    for i, chunk in enumerate(chunks):
+        if i and i % size == 0:
+            yield PAGE_BREAK
+        yield chunk
+
+def emit(output, interactive=True): # друкує відповідь команди; потокові відповіді — по одному запису, без накопичення
+    if isinstance(output, str):
+        print(output)
+        return
+    for chunk in output:
+        if chunk is PAGE_BREAK:
+            if interactive and input("-- Enter — далі, q — вихід -- ").strip().lower() == "q":
+                break
+        else:
+            print(chunk)
+
+#Статистика команд (вмикається SNAKY_STATS=1 або --stats)
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000) # межі кошиків гістограми
+
+class CommandStats: # лічильники, гістограми затримок і помилки кожної команди
+    enabled = False # вимкнено — декоратори роблять лише одну перевірку цього прапорця
+
+    def __init__(self):
+        self.calls = {}      # команда -> кількість викликів
+        self.errors = {}     # команда -> кількість винятків
+        self.total_ms = {}   # команда -> сумарний час
+        self.histograms = {} # команда -> лічильники кошиків (останній — довше за всі межі)
+        self.memory = {}     # команда -> пік пам'яті за tracemalloc
+        self.profile_commands = set()     # команди, які виконуються під cProfile
+        self.tracemalloc_commands = set() # команди, для яких міряємо пам'ять
+        self.profiles = {}   # команда -> cProfile.Profile
+        self.dump_file = None
+        self.dump_interval = 60.0
+        self._last_dump = time.monotonic()
+
+    def configure(self, enabled=True, profile=(), tracemalloc=(), dump_file=None, dump_interval=None):
+        self.enabled = enabled
+        self.profile_commands.update(profile)
+        self.tracemalloc_commands.update(tracemalloc)
+        if dump_file:
+            self.dump_file = dump_file
+            atexit.register(self.dump)
+        if dump_interval:
+            self.dump_interval = dump_interval
+
+    def configure_from_env(self, environ):
+        def names(variable):
+            return {name.strip() for name in environ.get(variable, "").split(",") if name.strip()}
+        if environ.get("SNAKY_STATS") or environ.get("SNAKY_PROFILE") or environ.get("SNAKY_TRACEMALLOC"):
+            self.configure(
+                profile=names("SNAKY_PROFILE"),
+                tracemalloc=names("SNAKY_TRACEMALLOC"),
+                dump_file=environ.get("SNAKY_STATS_FILE"),
+                dump_interval=float(environ.get("SNAKY_STATS_INTERVAL", 0)) or None,
+            )
+
+    def run(self, func, args, kwargs): # виконує обробник і записує його статистику
+        # Потокові відповіді (all, query...) виконують основну роботу вже під час друку, тож для них
+        # час, профайлер і tracemalloc зупиняються лише тоді, коли відповідь вичерпано або покинуто.
+        name = func.__name__
+        profiler = tracing = None
+        if name in self.profile_commands:
+            import cProfile
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+        if name in self.tracemalloc_commands:
+            import tracemalloc
+            tracing = tracemalloc
+            tracing.start()
+        elapsed = 0.0
+
+        def step(call): # частина роботи команди: під профайлером і з відліком часу (очікування друку не враховується)
+            nonlocal elapsed
+            started = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            try:
+                return call()
+            finally:
+                if profiler:
+                    profiler.disable()
+                elapsed += time.perf_counter() - started
+
+        def finish(error=False):
+            self.record(name, elapsed * 1000, error)
+            if tracing:
+                peak = tracing.get_traced_memory()[1]
+                tracing.stop()
+                self.memory[name] = max(self.memory.get(name, 0), peak)
+
+        try:
+            result = step(lambda: func(*args, **kwargs))
+        except Exception:
+            finish(error=True)
+            raise
+        if isinstance(result, str) or not hasattr(result, "__next__"):
+            finish()
+            return result
+        return self._stream(result, step, finish)
+
+    @staticmethod
+    def _stream(chunks, step, finish): # передає потокову відповідь далі, вимірюючи кожен її шматок
+        error = False
+        try:
+            while True:
+                try:
+                    chunk = step(lambda: next(chunks))
+                except StopIteration:
+                    return
+                yield chunk
+        except Exception:
+            error = True
+            raise
+        finally:
+            finish(error)
+
+    def record(self, name, elapsed_ms, error=False):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.total_ms[name] = self.total_ms.get(name, 0.0) + elapsed_ms
+        if error:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        histogram = self.histograms.setdefault(name, [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        if self.dump_file and time.monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
+
+    def _percentile(self, name, p): # верхня межа кошика, в який потрапляє p-й перцентиль
+        histogram = self.histograms[name]
+        target = p / 100 * sum(histogram)
+        seen = 0
+        for i, count in enumerate(histogram):
+            seen += count
+            if seen >= target and count:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else float("inf")
+        return 0.0
+
+    def snapshot(self): # статистика як словник (для JSON)
+        return {
+            name: {
+                "calls": calls,
+                "errors": self.errors.get(name, 0),
+                "avg_ms": self.total_ms[name] / calls,
+                "p50_ms_le": self._percentile(name, 50),
+                "p95_ms_le": self._percentile(name, 95),
+                "histogram": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["inf"], self.histograms[name])),
+                **({"peak_bytes": self.memory[name]} if name in self.memory else {}),
+            }
+            for name, calls in self.calls.items()
+        }
+
+    def dump(self): # записує статистику у файл (атомарно)
+        if not self.dump_file:
+            return
+        _write_json_atomic(self.dump_file, self.snapshot())
+        self._last_dump = time.monotonic()
+
+    def report(self):
+        if not self.calls:
+            return "📊 Ще немає жодної виміряної команди."
+        lines = ["📊 Статистика команд:", f"{'команда':20} {'викл.':>6} {'помил.':>6} {'сер. мс':>9} {'p50≤':>7} {'p95≤':>7}"]
+        for name, data in sorted(self.snapshot().items(), key=lambda item: -item[1]["calls"]):
+            memory = f"  пам'ять {data['peak_bytes'] / 1024:.0f} KiB" if "peak_bytes" in data else ""
+            lines.append(f"{name:20} {data['calls']:>6} {data['errors']:>6} {data['avg_ms']:>9.3f} "
+                         f"{data['p50_ms_le']:>7} {data['p95_ms_le']:>7}{memory}")
+        for name, profiler in self.profiles.items():
+            import io
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(10)
+            lines.append(f"\n🔬 cProfile: {name}\n{out.getvalue().strip()}")
+        return "\n".join(lines)
+
+    def reset(self):
+        for counters in (self.calls, self.errors, self.total_ms, self.histograms, self.memory, self.profiles):
+            counters.clear()
+
+STATS = CommandStats()
+STATS.configure_from_env(os.environ)
+
+TIMINGS = {} # фаза запуску -> мс (звіт параметра --timing)
+
+@contextlib.contextmanager
+def timed(phase): # додає тривалість блоку до фази phase
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[phase] = TIMINGS.get(phase, 0.0) + (time.perf_counter() - started) * 1000
+
+def timing_report():
+    total = (time.perf_counter() - _IMPORT_STARTED) * 1000
+    phases = "".join(f"\n  {phase}: {ms:.1f} мс" for phase, ms in TIMINGS.items())
+    return f"⏱ Час запуску:{phases}\n  разом від імпорту: {total:.1f} мс"
+
+def guard_stream(output): # потокова відповідь, у якій помилка під час друку стає останнім рядком, а не зупиняє програму
+    if isinstance(output, str) or not hasattr(output, "__next__"):
+        return output
+    return _guarded_stream(output)
+
+def _guarded_stream(chunks): # all, query тощо читають сховище вже під час друку — поза try декоратора
+    try:
+        yield from chunks
+    except Exception as e: # пошкоджений рядок бази чи знімка: показуємо, що вже прочитано, і причину
+        yield f"⚠️ Не вдалося дочитати відповідь: {e}"
+
+def input_error(func): # декоратор для обробки помилок введення
+    def wrapper(*args, **kwargs):
+        try:
+            if STATS.enabled:
+                output = STATS.run(func, args, kwargs)
+            else:
+                output = func(*args, **kwargs)
+        except Exception as e:
+            return f"Помилка: {str(e)}"
+        return guard_stream(output)
+    return wrapper
+
+@input_error
+def show_stats(args, book): # команда stats: спільна для контактів і нотаток
+    if not STATS.enabled:
+        return "📊 Статистику вимкнено. Увімкни її змінною SNAKY_STATS=1 або параметром --stats."
+    if args and args[0] == "reset":
+        STATS.reset()
+        return "📊 Статистику скинуто."
+    return STATS.report()
+
+COMPLETION_LIMIT = 10 # скільки варіантів показують complete і Tab
+
+@input_error
+def complete_names(args, book): # команда complete: спільна для контактів і нотаток
+    limit = COMPLETION_LIMIT
+    if len(args) > 1 and args[-1].isdigit():
+        limit = int(args.pop())
+    names = book.complete(" ".join(args), limit)
+    if not names:
+        return "Ой-йой, нічого не знайдено 😢"
+    return "\n".join(names)
 
 def input_error_contact(func):
     def inner(*args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            if STATS.enabled:
+                output = STATS.run(func, args, kwargs)
+            else:
+                output = func(*args, **kwargs)
         except ValueError:
             return "😳 Команда не розпізнана. Можливо, ти винайшла(-ов) нову функцію? Введи help_contacts для списку доступного 😅"
         except KeyError:
             return "⚠️  Контакт не знайдено. Перевір, чи правильно вказано ім’я. Можеш скористатися командою 'all', щоб побачити список контактів."
         except IndexError:
             return "⚠️  Здається, ти забув(ла) вказати ім’я."
+        return guard_stream(output)
     return inner
 
 def parse_input(user_input):
-    cmd, args = user_input.split()
-    cmd = cmd.strip().lower()
-    return cmd, *args
+    # 1) Видаляємо пробіли спереду/ззаду
+    # 2) Розбиваємо на слова
+    words = user_input.strip().split()
+    if not words: # порожній рядок — порожня команда
+        return "", []
+    cmd, *args = words
+    # 3) Повертаємо команду у нижньому регістрі та решту слів як аргументи
+    return cmd.lower(), args
 
 @input_error_contact
 def add_contact(args, book: AddressBook):
@@ -247,53 +2592,133 @@ def change_contact(args, book: AddressBook):
        name, new_phone = args
        record = book.find(name)
        if record:
-           record.phones = []  
-           record.add_phone(new_phone)
+           record.replace_phones([new_phone])
            return "Контакт змінено"
        else:
            return "Ой-йой, контакт не знайдено 😢"
        
 @input_error_contact
-def show_contact(name, book: AddressBook):
+def show_contact(args, book: AddressBook):
+    name = args[0]
     record = book.find(name)
     if record:
-        phones = ", ".join([phone.value for phone in record.phones]) if record.phones else "Немає номерів"
-        email = record.email.value if record.email else "Немає email"
-        address = record.address.value if record.address else "Немає адреси"
-        birthday = record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "Немає дня народження"
+        return render_contact_card(record)
+    suggestions = [record.name.value for record, _ in book.fuzzy_find(name, limit=3)]
+    if suggestions:
+        return f"Ой-йой, контакт не знайдено 😢 Можливо, ти мав(ла) на увазі: {', '.join(suggestions)}?"
+    return "Ой-йой, контакт не знайдено 😢"
+
+QUERY_CONDITIONS = { # умова команди query -> параметр AddressBook.query
+    "name": "name_prefix",
+    "domain": "email_domain",
+    "email": "email_domain",
+    "address": "address",
+    "phone": "phone_prefix",
+    "month": "birthday_month",
+}
 
-        return (
-            f"📇 Контакт: {record.name.value}\n"
-            f"📞 Телефони: {phones}\n"
-            f"📧 Email: {email}\n"
-            f"🏠 Адреса: {address}\n"
-            f"🎂 День народження: {birthday}"
-        )
-    else:
-        return "Ой-йой, контакт не знайдено 😢"
+@input_error_contact
+def query_contacts(args, book: AddressBook): # пошук за кількома полями: query domain=gmail.com month=3
+    usage = "⚠️ Приклад: query name=Ма domain=gmail.com address=Лісова phone=050 month=3"
+    conditions = {}
+    key = None
+    for token in args:
+        if "=" in token:
+            key, _, value = token.partition("=")
+            key = key.lower()
+            if key not in QUERY_CONDITIONS:
+                return f"⚠️ Невідома умова '{key}'. Можливі: {', '.join(QUERY_CONDITIONS)}"
+            conditions[QUERY_CONDITIONS[key]] = value
+        elif key: # слова без «=» дописуються до попередньої умови: address=вул. Лісова
+            conditions[QUERY_CONDITIONS[key]] += " " + token
+        else:
+            return usage
+    if not conditions:
+        return usage
+    if "birthday_month" in conditions:
+        if not conditions["birthday_month"].isdigit():
+            return "⚠️ Місяць має бути числом від 1 до 12"
+        conditions["birthday_month"] = int(conditions["birthday_month"])
+    try:
+        records = book.query(**conditions)
+    except ValueError as e:
+        return f"⚠️ {e}"
+    if not records:
+        return "Ой-йой, жодного контакту не знайдено 😢"
+    return itertools.chain([f"🔎 Знайдено контактів: {len(records)}"], map(render_contact, records))
 
 @input_error_contact
-def show_all(book: AddressBook):
-    if not book.data:
-        return "Книга контактів порожня"
+def fuzzy_search(args, book: AddressBook): # пошук контакту з помилками в імені або іншою абеткою
+    query = args[0]
+    limit = int(args[1]) if len(args) > 1 else 5
+    matches = book.fuzzy_find(query, limit)
+    if not matches:
+        return f"Ой-йой, нічого схожого на '{query}' не знайдено 😢"
+    return "\n".join(f"👤 {record.name.value} (відмінностей: {distance})" for record, distance in matches)
 
-    result = ""
-    for record in book.data.values():
-        name = record.name.value
-        phones = ", ".join(phone.value for phone in record.phones) if record.phones else "не вказано"
+def _filled_fields(record): # скільки даних у записі: ціль злиття — найповніший запис
+    return len(record._phones) + bool(record.email) + bool(record.address) + bool(record.birthday)
+
+@input_error_contact
+def dedupe(args, book: AddressBook): # пошук дублікатів; dedupe --merge зливає кожну групу в один запис
+    merge = "--merge" in args
+    clusters = book.find_duplicates()
+    if not clusters:
+        return "👌 Дублікатів не знайдено."
+    if not merge:
+        lines = [f"🔁 Схожих груп контактів: {len(clusters)} (dedupe --merge, щоб об'єднати)"]
+        lines += [f"• {', '.join(names)}" for names in clusters]
+        return "\n".join(lines)
+    lines = [f"🔁 Об'єднано груп контактів: {len(clusters)}"]
+    for names in clusters:
+        names.sort(key=lambda name: -_filled_fields(book.find(name))) # стабільно: за рівності — за абеткою
+        book.merge_records(names)
+        lines.append(f"• {names[0]} ← {', '.join(names[1:])}")
+    return "\n".join(lines)
+
+def render_contact(record): # один запис у форматі команди all; кешується в записі до його зміни
+    cache = record._render_cache()
+    if cache[0] is None:
+        phones = ", ".join(record.phone_numbers()) or "не вказано"
         birthday = record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "не вказано"
         email = record.email.value if record.email else "не вказано"
         address = record.address.value if record.address else "не вказано"
-        result += (
-            f"👤 Name: {name}\n"
+        cache[0] = (
+            f"👤 Name: {record.name.value}\n"
             f"📞 Phones: {phones}\n"
             f"🎉 Birthday: {birthday}\n"
             f"📧 Email: {email}\n"
             f"🏠 Address: {address}\n"
-            "--------------------------------\n"
+            "--------------------------------"
         )
+    return cache[0]
 
-    return result.strip()
+def render_contact_card(record): # картка контакту для команди contact; теж кешується
+    cache = record._render_cache()
+    if cache[1] is None:
+        phones = ", ".join(record.phone_numbers()) or "Немає номерів"
+        email = record.email.value if record.email else "Немає email"
+        address = record.address.value if record.address else "Немає адреси"
+        birthday = record.birthday.value.strftime("%d.%m.%Y") if record.birthday else "Немає дня народження"
+        cache[1] = (
+            f"📇 Контакт: {record.name.value}\n"
+            f"📞 Телефони: {phones}\n"
+            f"📧 Email: {email}\n"
+            f"🏠 Адреса: {address}\n"
+            f"🎂 День народження: {birthday}"
+        )
+    return cache[1]
+
+def iter_contacts(book: AddressBook): # генератор: записи читаються зі сховища й рендеряться по одному, коли їх друкують
+    for record in book.stream_records(): # лінива книга не завантажується в пам'ять цілком
+        yield render_contact(record)
+
+@input_error_contact
+def show_all(args, book: AddressBook):
+    if not len(book):
+        return "Книга контактів порожня"
+    options = parse_listing_options(args)
+    return paginate(iter_contacts(book), **options)
 
 @input_error_contact
 def add_birthday(args, book: AddressBook):
@@ -333,6 +2758,17 @@ def birthdays(args, book: AddressBook):
         result += f"👤 {record.name.value} — {date}\n"
     return result.strip()
 
+@input_error_contact
+def find_by_phone(args, book: AddressBook): # зворотний пошук: хто телефонує з цього номера
+    phone = args[0]
+    if len(phone) == 10:
+        matches = [(phone, record) for record in book.find_by_phone(phone)]
+    else:
+        matches = book.find_by_phone_prefix(phone, limit=50)
+    if not matches:
+        return f"Ой-йой, номер '{phone}' не знайдено 😢"
+    return "\n".join(f"📞 {number} — 👤 {record.name.value}" for number, record in matches)
+
 @input_error_contact
 def delete(args, book: AddressBook):
     name = args[0]
@@ -363,6 +2799,28 @@ def add_address(args, book: AddressBook):
         return f"Адресу додано до контакту {name}."
     return f"Ой-йой, контакт '{name}' не знайдено 😢"
 
+@input_error_contact
+def import_contacts(args, book: AddressBook): # масовий імпорт контактів з CSV/JSONL
+    filename, workers = parse_bulk_args(args)
+    try:
+        bulk_format(filename)
+        return import_report(*import_file(book, filename, "contacts", workers))
+    except ValueError as e:
+        return f"⚠️ {e}"
+    except OSError as e:
+        return f"Ой-йой, не вдалося прочитати файл '{filename}': {e.strerror}"
+
+@input_error_contact
+def export_contacts(args, book: AddressBook): # масовий експорт контактів у CSV/JSONL
+    filename = args[0]
+    try:
+        bulk_format(filename)
+        return f"📤 Експортовано записів: {export_file(book, filename, 'contacts')} у файл {filename}."
+    except ValueError as e:
+        return f"⚠️ {e}"
+    except OSError as e:
+        return f"Ой-йой, не вдалося записати файл '{filename}': {e.strerror}"
+
 def help_contacts():
     return """
 Доступні команди:
@@ -370,33 +2828,26 @@ def help_contacts():
 • add [ім'я] [телефон]        – додати контакт
 • change [ім'я] [телефон]     – змінити номер телефону контакту
 • contact [ім'я]              – показати всі дані контакту
-• all                         – показати всі дані контактів
+• all [--page N] [--size K] [--limit L] [--pager] – показати всі дані контактів (посторінково)
 • add_birthday [ім'я] [дата]  – додати день народження
 • show_birthday [ім'я]        – показати день народження контакта
 • birthdays [кількість днів]  – показати дні народження, що наближаються
+• find_phone [номер]          – знайти контакт за номером або його початком
+• fuzzy [ім'я] [кількість]    – знайти схожі імена (з помилками, кирилицею чи латиницею)
+• query [умова=значення ...]  – пошук за кількома полями: name=, domain=, address=, phone=, month=
+• complete [початок] [k]      – перші k імен, що починаються з початку (Tab доповнює імена сам)
+• dedupe [--merge]            – знайти ймовірні дублікати (спільний номер, email чи схоже ім'я) і за бажанням об'єднати
 • add_email [ім'я] [email]    – додати email контакту
 • add_address [ім'я] [адреса] – додати адресу контакту
 • delete [ім'я]               – видалити контакт
+• import [файл] [--workers N] – імпортувати контакти з .csv, .jsonl або .snap
+• export [файл]               – експортувати контакти у .csv, .jsonl або .snap
+• stats [reset]               – статистика швидкодії команд (SNAKY_STATS=1 або --stats)
 • close, exit                 – завершити роботу з контактами, повернутися до стартового меню
 """
 
 """Модуль для управління нотатками. Включає класи для створення, видалення, пошуку та виведення нотаток.
 Використовує UserDict для зберігання нотаток та забезпечує зручний інтерфейс для роботи з ними. """
-def input_error(func): # декоратор для обробки помилок введення
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            return f"Помилка: {str(e)}"
-    return wrapper
-
-def parse_input(user_input):
-    # 1) Видаляємо пробіли спереду/ззаду
-    # 2) Розбиваємо на слова
-    cmd, *args = user_input.strip().split()
-    # 3) Повертаємо команду у нижньому регістрі та решту слів як аргументи
-    return cmd.lower(), args
-
 @input_error
 def add_note(args, book: NotesBook): # Функція для додавання нотатки
     name = args[0] 
@@ -420,9 +2871,7 @@ def edit_name(args, book: NotesBook): # Функція для редагуван
     old_name, new_name = args[0], args[1]
     if old_name not in book.data:
         return f"Ой-йой, нотатку з назвою '{old_name}' не знайдено 😢"
-    note = book.data.pop(old_name)
-    note.name.value = new_name
-    book.data[new_name] = note
+    book.rename_note(old_name, new_name)
     return f"Назву нотатки змінено з '{old_name}' на '{new_name}'."
 
 @input_error
@@ -433,15 +2882,19 @@ def edit_text(args, book: NotesBook): # Функція для редагуван
     new_text = " ".join(args[1:])
     if name not in book.data:
         return f"Ой-йой, нотатку '{name}' не знайдено 😢"
-    book.data[name].text.value = new_text
+    book.edit_note_text(name, new_text)
     return f"Текст нотатки '{name}' успішно оновлено."
 
+def iter_notes(book: NotesBook): # генератор: нотатки форматуються по одній, коли їх друкують
+    for note in book.records():
+        yield str(note)
+
 @input_error
-def show_notes(book: NotesBook): # Функція для виведення всіх нотаток
-    notes = book.get_all_notes()
-    if not notes:
+def show_notes(args, book: NotesBook): # Функція для виведення всіх нотаток
+    if not book.data:
         return "Книга нотаток порожня."
-    return "\n".join(str(note) for note in notes)
+    options = parse_listing_options(args)
+    return paginate(iter_notes(book), **options)
 
 @input_error
 def search_note(args, book: NotesBook): # Функція для пошуку нотатки за назвою
@@ -462,14 +2915,37 @@ def search_tag(args, book: NotesBook): # Функція для пошуку но
     return "\n".join(str(note) for note in results) if results else "Ой-йой, шось пішло не так 😅 Нотатки з таким тегом не знайдено."
 
 @input_error # Функція для сортування тегів нотаток - бонусне завдання
-def sort_tags(book: NotesBook):
-    notes = book.get_all_notes()
-    tags = [note.tag.value for note in notes if note.tag and note.tag.value]
-    if not tags:
+def sort_tags(args, book: NotesBook):
+    sorted_tags = book.sorted_tags()
+    if not sorted_tags:
         return "📦 Упс! Схоже, цей тег десь сховався між рядками коду або випив всю кавусю... Ми його не знайшли 😅"
-    sorted_tags = sorted(set(tags), key=str.lower)
     return "📚 Всі теги у нотатках (в алфавітному порядку):\n" + "\n".join(f"• {tag}" for tag in sorted_tags)
 
+@input_error # Функція для хмари тегів: кожен тег із кількістю нотаток
+def tag_cloud(args, book: NotesBook):
+    counts = book.tag_counts()
+    if not counts:
+        return "📦 Упс! Схоже, цей тег десь сховався між рядками коду або випив всю кавусю... Ми його не знайшли 😅"
+    return "☁️ Хмара тегів:\n" + "\n".join(f"• {tag} ({count})" for tag, count in counts)
+
+@input_error
+def import_notes(args, book: NotesBook): # Масовий імпорт нотаток з CSV/JSONL
+    filename, workers = parse_bulk_args(args)
+    try:
+        bulk_format(filename)
+        return import_report(*import_file(book, filename, "notes", workers))
+    except OSError as e:
+        return f"Ой-йой, не вдалося прочитати файл '{filename}': {e.strerror}"
+
+@input_error
+def export_notes(args, book: NotesBook): # Масовий експорт нотаток у CSV/JSONL
+    filename = args[0]
+    try:
+        bulk_format(filename)
+        return f"📤 Експортовано нотаток: {export_file(book, filename, 'notes')} у файл {filename}."
+    except OSError as e:
+        return f"Ой-йой, не вдалося записати файл '{filename}': {e.strerror}"
+
 def show_help(): # Функція для виведення довідки з доступними командами
     return """
  Доступні команди Notes:
@@ -478,15 +2954,84 @@ def show_help(): # Функція для виведення довідки з д
 • add [назва] [текст] [тег]        – додати нову нотатку
 • edit_name [стара] [нова назва]   – змінити назву нотатки
 • edit_text [назва] [новий текст]  – змінити текст нотатки
-• all                              – показати всі нотатки
+• all [--page N] [--size K] [--limit L] [--pager] – показати всі нотатки (посторінково)
 • delete [назва]                   – видалити нотатку за назвою
 • search [частина назви]           – пошук за назвою нотатки
+• complete [початок] [k]           – перші k назв, що починаються з початку (Tab доповнює назви сам)
 • search_notes [ключове слово]     – пошук за текстом нотатки
 • search_tag [тег]                 – пошук за тегом нотатки
 • sort_tags                        – показати всі теги, відсортовані за алфавітом
+• tags                             – показати хмару тегів з кількістю нотаток
+• import [файл] [--workers N]      – імпортувати нотатки з .csv, .jsonl або .snap
+• export [файл]                    – експортувати нотатки у .csv, .jsonl або .snap
+• stats [reset]                    – статистика швидкодії команд (SNAKY_STATS=1 або --stats)
 • exit / close                     – завершити роботу з нотатками, повернутися до стартового меню
 """
 
+UNKNOWN_CONTACT_COMMAND = "😳 Команда не розпізнана. Можливо, ти винайшла(-ов) нову функцію? Введи help_contacts для списку доступного 😅"
+UNKNOWN_NOTE_COMMAND = "😳 Команда не розпізнана. Можливо, ти винайшла(-ов) нову функцію? Введи help для списку доступного 😅"
+
+# Таблиці команд: назва -> обробник(args, book). Спільні для меню та пакетного режиму
+CONTACT_COMMANDS = {
+    "help_contacts": lambda args, book: help_contacts(),
+    "add": add_contact,
+    "change": change_contact,
+    "contact": show_contact,
+    "all": show_all,
+    "add_birthday": add_birthday,
+    "show_birthday": show_birthday,
+    "birthdays": birthdays,
+    "find_phone": find_by_phone,
+    "fuzzy": fuzzy_search,
+    "query": query_contacts,
+    "complete": complete_names,
+    "dedupe": dedupe,
+    "add_email": add_email,
+    "add_address": add_address,
+    "delete": delete,
+    "import": import_contacts,
+    "export": export_contacts,
+    "stats": show_stats,
+}
+
+NOTE_COMMANDS = {
+    "help": lambda args, book: show_help(),
+    "add": add_note,
+    "delete": delete_note,
+    "edit_name": edit_name, # Редагування назви нотатки
+    "edit_text": edit_text, # Редагування тексту нотатки
+    "search": search_note, # Пошук нотатки за частиною назви
+    "complete": complete_names, # Назви нотаток, що починаються з префікса
+    "search_notes": search_note_text, # Пошук нотатки за текстом
+    "search_tag": search_tag, # Пошук нотатки за тегом - бонусне завдання
+    "sort_tags": sort_tags, # Сортування тегів нотаток - бонусне завдання
+    "tags": tag_cloud, # Хмара тегів з кількістю нотаток
+    "all": show_notes, # Показати всі нотатки
+    "import": import_notes, # Масовий імпорт з CSV/JSONL
+    "export": export_notes, # Масовий експорт у CSV/JSONL
+    "stats": show_stats, # Статистика команд (якщо увімкнена)
+}
+
+BOOKLESS_COMMANDS = {"help_contacts", "help", "stats"} # команди, яким не треба відкривати книгу
+
+def enable_completion(commands, get_book): # Tab: перше слово — команда, далі — імена з книги
+    try:
+        import readline
+    except ImportError: # без readline (наприклад, Windows) працюємо без доповнення
+        return
+    def completer(text, state):
+        if " " not in readline.get_line_buffer().lstrip():
+            matches = [command for command in commands if command.startswith(text)]
+        else:
+            matches = get_book().complete(text, COMPLETION_LIMIT)
+        return matches[state] if state < len(matches) else None
+    readline.set_completer(completer)
+    readline.set_completer_delims(" ")
+    if "libedit" in (readline.__doc__ or ""): # macOS
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
 def main_menu():
     while True:
         print("\n📁 Головне меню")
@@ -507,108 +3052,365 @@ def main_menu():
         else:
             print("⛔ Невірний вибір. Спробуй ще раз.")
 
-print("👋 Вітаємо тебе у світі Snaky sisters 🐍! Тут код не просто працює — він танцює!")
-
 def main_contacts():
-    book = load_data()
+    book = None # Книга відкривається лише перед першою командою, якій вона потрібна
     print("📖 Книга контактів – готова до роботи!")
     print("💡 Для перегляду всього переліку команд введіть: help_contacts")
+
+    def get_book(): # Книга відкривається лише перед першою командою (або першим Tab), якій вона потрібна
+        nonlocal book
+        if book is None:
+            book = open_contact_book() # SQLite фіксує кожну зміну одразу, шарди (--storage shards) — під час exit
+        return book
+
+    enable_completion(CONTACT_COMMANDS, get_book)
     while True:
         user_input = input("--> ")
         command, args = parse_input(user_input)
 
         if command in ["close", "exit"]:
-            save_data(book)
+            if book is not None:
+                book.close()
             print("👋 Дякуємо за використання книги контактів! До нових зустрічей! 🐍")
             break
 
-        elif command == "help_contacts":
-            print(help_contacts())
-
-        elif command == "add":
-            print(add_contact(args, book))
-
-        elif command == "change":
-            print(change_contact(args, book))
-
-        elif command == "contact":
-            print (show_contact (args[0], book))
-
-        elif command == "all":
-            print (show_all (book))
-
-        elif command == "add_birthday":
-            print (add_birthday (args, book))
-
-        elif command == "show_birthday":
-            print (show_birthday (args, book))
-
-        elif command == "birthdays":
-            print (birthdays (args, book))
-
-        elif command == "add_email":
-            print(add_email(args, book))
-
-        elif command == "add_address":
-            print(add_address(args, book))    
-        
-        elif command == "delete":
-            print ( delete (args, book))    
-
-        else:
-            print("😳 Команда не розпізнана. Можливо, ти винайшла(-ов) нову функцію? Введи help_contacts для списку доступного 😅")
+        handler = CONTACT_COMMANDS.get(command)
+        if handler and command not in BOOKLESS_COMMANDS:
+            get_book()
+        emit(handler(args, book) if handler else UNKNOWN_CONTACT_COMMAND)
+
+def open_notes_book(autoflush=True): # завантажує нотатки та вмикає журнал змін
+    if STORAGE_SHARDS is not None:
+        return open_sharded_notes_book()
+    with timed("завантаження нотаток"):
+        notes = NotesBook()
+        notes.load() # Завантажуємо нотатки з файлу при запуску
+        if not isinstance(notes.data, MappedNotes): # перший запуск після notes.json — переносимо у знімок з індексом
+            notes.use_mapped_storage()
+        notes.open_journal(autoflush=autoflush) # Далі кожна зміна дописується у журнал, а не переписує весь файл
+    return notes
+
+def open_sharded_notes_book(directory="notes.shards"): # нотатки у шардах: без журналу, змінені шарди пишуться у flush() і close()
+    with timed("завантаження нотаток"):
+        notes = NotesBook()
+        if os.path.isdir(directory):
+            notes.load_shards(directory)
+        else: # перший запуск у шардах — переносимо notes.json (разом із журналом)
+            notes.load()
+            notes.save_shards(directory, STORAGE_SHARDS)
+    return notes
 
 def main_notes(): # Головна функція для запуску програми
-    notes = NotesBook() 
-    notes.load() # Завантажуємо нотатки з файлу при запуску
+    notes = None # Нотатки завантажуються лише перед першою командою, якій вони потрібні
     print("👋 Вітаємо в блокноті Notes 🐍 від Snaky sisters!")
     print("💡 Для перегляду всього переліку команд введіть: help")
 
+    def get_notes():
+        nonlocal notes
+        if notes is None:
+            notes = open_notes_book()
+        return notes
+
+    enable_completion(NOTE_COMMANDS, get_notes)
     while True:
         user_input = input("--> ")
 
         command, args = parse_input(user_input)
 
-        match command: # Використовуємо match-case для обробки команд
-            case "add":
-                print(add_note(args, notes))
-                notes.save() # Зберігаємо нотатки після додавання
-            case "delete":
-                print(delete_note(args, notes))
-                notes.save() # Зберігаємо нотатки після видалення
-        
-            case "edit_name": # Редагування назви нотатки
-                print(edit_name(args, notes))
-                notes.save()
-
-            case "edit_text": # Редагування тексту нотатки
-                print(edit_text(args, notes))
-                notes.save()
-
-            case "search": # Пошук нотатки за частиною назви
-                print(search_note(args, notes))
-
-            case "search_notes": # Пошук нотатки за текстом
-                print(search_note_text(args, notes))
+        if command in ["exit", "close"]: # Завершення роботи програми
+            if notes is not None:
+                notes.close()
+            print("👋 Дякуємо за використання блокноту Notes! До нових зустрічей! 🐍")
+            break
 
-            case "search_tag":  # Пошук нотатки за тегом - бонусне завдання
-                print(search_tag(args, notes))
+        handler = NOTE_COMMANDS.get(command)
+        if handler and command not in BOOKLESS_COMMANDS:
+            get_notes()
+        emit(handler(args, notes) if handler else UNKNOWN_NOTE_COMMAND)
 
-            case "sort_tags": # Сортування тегів нотаток - бонусне завдання
-                print(sort_tags(notes))
+def run_batch(lines, open_book, commands, unknown_message, save_every=None): # виконує команди по рядку без інтерактиву
+    book = None # відкриваємо лише тоді, коли якійсь команді потрібна книга
+    executed = 0
+    try:
+        for line in lines:
+            command, args = parse_input(line)
+            if not command or command.startswith("#"): # порожні рядки та коментарі пропускаємо
+                continue
+            if command in ["close", "exit"]:
+                break
+            handler = commands.get(command)
+            if handler and book is None and command not in BOOKLESS_COMMANDS:
+                book = open_book()
+            with timed("виконання команд"):
+                emit(handler(args, book) if handler else unknown_message, interactive=False)
+            executed += 1
+            if save_every and book is not None and executed % save_every == 0:
+                book.flush()
+    finally:
+        if book is not None:
+            book.close()
+    return executed
+
+def open_batch_address_book(): # книга контактів для пакетного режиму
+    book = open_contact_book()
+    book.storage.autocommit = False # одна транзакція замість коміту на кожну зміну
+    return book
+
+#Серверний режим: одна спільна книга для багатьох сесій
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+END_OF_RESPONSE = "\x04" # окремий рядок, яким сервер завершує кожну відповідь
+FLUSH_DELAY = 0.5      # секунд тиші після зміни, перш ніж зберегти
+WRITE_TIMEOUT = 30.0   # секунд на відправлення відповіді; клієнта, що не читає довше, від'єднуємо
+MAX_FLUSH_DELAY = 5.0  # але не довше за стільки від першої незбереженої зміни
+
+async def drain(writer): # чекає, поки клієнт прочитає відповідь, але не довше за WRITE_TIMEOUT
+    import asyncio
+    try:
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ConnectionError("клієнт не читає відповідь") from None
+
+class CommandServer: # обслуговує команди клієнтів над спільними книгами контактів і нотаток
+    def __init__(self, contacts, notes, flush_delay=FLUSH_DELAY, max_flush_delay=MAX_FLUSH_DELAY):
+        import asyncio
+        self.sections = {
+            "contacts": (contacts, CONTACT_COMMANDS, UNKNOWN_CONTACT_COMMAND),
+            "notes": (notes, NOTE_COMMANDS, UNKNOWN_NOTE_COMMAND),
+        }
+        self.lock = asyncio.Lock() # команди виконуються по одній; відповідь клієнту пишеться вже поза замком
+        self.flush_delay = flush_delay
+        self.max_flush_delay = max_flush_delay
+        self._flush_handle = None
+        self._dirty_since = None
+
+    async def execute(self, section, line, writer): # виконує одну команду і пише відповідь клієнту
+        command, args = parse_input(line)
+        book, commands, unknown_message = self.sections[section]
+        handler = commands.get(command)
+        async with self.lock:
+            output = handler(args, book) if handler else unknown_message
+            if not isinstance(output, str): # потокову відповідь збираємо під замком, щоб книга не змінилась посередині
+                output = "\n".join(chunk for chunk in output if chunk is not PAGE_BREAK)
+        writer.write((output + "\n").encode()) # пишемо вже без замка: клієнт, що не читає, не блокує інших
+        await drain(writer)
+        if handler:
+            self.schedule_flush()
+
+    def schedule_flush(self): # відкладене збереження: серія змін фіксується одним скиданням
+        import asyncio
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        delay = min(self.flush_delay, self._dirty_since + self.max_flush_delay - now)
+        self._flush_handle = loop.call_later(max(delay, 0), self.flush)
+
+    def flush(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = self._dirty_since = None
+        for book, _, _ in self.sections.values():
+            book.flush()
+
+    async def handle_client(self, reader, writer): # одна сесія: рядок команди -> відповідь + END_OF_RESPONSE
+        section = "contacts"
+        def reply(text):
+            writer.write(f"{text}\n{END_OF_RESPONSE}\n".encode())
+        reply(f"🐍 Snaky sisters: підключено. Розділ: {section}. Команда use contacts|notes змінює розділ.")
+        try:
+            while True:
+                await drain(writer)
+                data = await reader.readline()
+                if not data:
+                    break
+                line = data.decode(errors="replace")
+                command, args = parse_input(line)
+                if not command:
+                    reply("")
+                elif command in ["close", "exit"]:
+                    reply("👋 Сесію завершено.")
+                    break
+                elif command == "use":
+                    if args and args[0] in self.sections:
+                        section = args[0]
+                        reply(f"📂 Розділ: {section}")
+                    else:
+                        reply("⚠️ Використання: use contacts|notes")
+                else:
+                    await self.execute(section, line, writer)
+                    writer.write(f"{END_OF_RESPONSE}\n".encode())
+            await drain(writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, socket_path=None):
+        import asyncio
+        import signal
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=socket_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signame in ("SIGINT", "SIGTERM"): # коректна зупинка і з терміналу, і від менеджера процесів
+            with contextlib.suppress(NotImplementedError, AttributeError):
+                loop.add_signal_handler(getattr(signal, signame), stopped.set)
+        where = socket_path or f"{host}:{port}"
+        print(f"🐍 Сервер Snaky sisters слухає {where} (Ctrl+C — зупинити)")
+        async with server:
+            await stopped.wait()
+        self.flush()
+
+def run_server(host=SERVER_HOST, port=SERVER_PORT, socket_path=None, reminders=None): # запускає сервер над спільними книгами
+    import asyncio
+    book = open_contact_book()
+    book.storage.autocommit = False # фіксуємо відкладено, а не на кожну зміну
+    notes = open_notes_book(autoflush=False)
+    server = CommandServer(book, notes)
+    if reminders is not None: # (за скільки днів, файл): add_birthday і delete клієнтів одразу змінюють розклад
+        reminders = BirthdayReminders(book, reminder_output(reminders[1]), reminders[0]).start()
+    try:
+        asyncio.run(server.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if reminders is not None:
+            reminders.stop()
+        book.close()
+        notes.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("👋 Сервер зупинено, зміни збережено.")
+
+def run_reminders(days_before=0, filename=None): # лише нагадування: процес спить до найближчого дня народження
+    book = open_contact_book()
+    reminders = BirthdayReminders(book, reminder_output(filename), days_before)
+    print(f"⏰ Нагадування про дні народження увімкнено (контактів з датою: {len(reminders.due)}). Ctrl+C — зупинити.")
+    try:
+        reminders.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        book.close()
+
+def run_client(host=SERVER_HOST, port=SERVER_PORT, socket_path=None): # тонкий клієнт: той самий синтаксис команд
+    import socket
+    if socket_path:
+        connection = socket.socket(socket.AF_UNIX)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection((host, port))
+    interactive = sys.stdin.isatty()
+    with connection, connection.makefile("r", encoding="utf-8") as responses:
+        def print_response():
+            for line in responses:
+                if line.rstrip("\n") == END_OF_RESPONSE:
+                    return True
+                print(line, end="")
+            return False # сервер закрив з'єднання
+        if not print_response():
+            return
+        while True:
+            try:
+                line = input("--> ") if interactive else sys.stdin.readline()
+            except EOFError:
+                line = ""
+            if not line: # кінець вводу — завершуємо сесію
+                line = "exit"
+            connection.sendall((line.strip() + "\n").encode())
+            if not print_response() or parse_input(line)[0] in ["close", "exit"]:
+                break
 
-            case "all": # Показати всі нотатки
-                print(show_notes(notes))
+def storage_option(value): # "sqlite" -> None, "shards[:N]" -> кількість шардів
+    import argparse
+    kind, _, count = value.partition(":")
+    if kind == "sqlite" and not count:
+        return None
+    if kind == "shards":
+        if not count:
+            return DEFAULT_SHARDS
+        if count.isdigit() and int(count) > 0:
+            return int(count)
+    raise argparse.ArgumentTypeError(f"очікується sqlite або shards[:N], а не {value!r}")
+
+def parse_cli(argv=None): # (параметри, parser) командного рядка
+    import argparse
+    parser = argparse.ArgumentParser(description="Персональний помічник Snaky Sisters")
+    section = parser.add_mutually_exclusive_group()
+    section.add_argument("--contacts", action="store_true", help="одразу відкрити книгу контактів")
+    section.add_argument("--notes", action="store_true", help="одразу відкрити блокнот")
+    parser.add_argument("--batch", metavar="FILE", help="виконати команди з файлу ('-' — зі stdin) без інтерактиву")
+    parser.add_argument("--save-every", type=int, metavar="N", help="у пакетному режимі зберігати зміни кожні N команд (типово — лише в кінці)")
+    parser.add_argument("--stats", action="store_true", help="збирати статистику швидкодії команд (команда stats)")
+    parser.add_argument("--profile", metavar="CMDS", default="", help="виконувати ці обробники (через кому) під cProfile")
+    parser.add_argument("--stats-file", metavar="FILE", help="періодично скидати статистику у JSON-файл")
+    parser.add_argument("--width", type=int, metavar="N", help=f"ширина переносу тексту нотаток (типово {NoteRecord.wrap_width})")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--serve", action="store_true", help="запустити сервер зі спільними книгами для багатьох клієнтів")
+    mode.add_argument("--connect", action="store_true", help="підключитися до запущеного сервера")
+    parser.add_argument("--host", default=SERVER_HOST, help=f"адреса сервера (типово {SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"порт сервера (типово {SERVER_PORT})")
+    parser.add_argument("--socket", metavar="PATH", help="Unix-сокет замість TCP")
+    parser.add_argument("--reminders", action="store_true", help="нагадувати про дні народження (окремо або разом із --serve)")
+    parser.add_argument("--remind-days", type=int, default=0, metavar="N", help="нагадувати за N днів до дня народження")
+    parser.add_argument("--reminders-file", metavar="FILE", help="дописувати нагадування у файл замість stdout")
+    parser.add_argument("--storage", type=storage_option, default=None, metavar="sqlite|shards[:N]",
+                        help=f"де зберігати книги: SQLite і журнал (типово) або шарди у каталогах *.shards (N — кількість, типово {DEFAULT_SHARDS})")
+    parser.add_argument("--timing", action="store_true", help="вивести у stderr час імпорту, завантаження книг і виконання команд")
+    return parser.parse_args(argv), parser
+
+def main(argv=None):
+    global STORAGE_SHARDS
+    with timed("розбір параметрів"):
+        args, parser = parse_cli(argv)
+    if args.width:
+        NoteRecord.wrap_width = args.width
+    STORAGE_SHARDS = args.storage
+
+    if args.stats or args.profile or args.stats_file:
+        STATS.configure(
+            profile={name for name in args.profile.split(",") if name},
+            dump_file=args.stats_file,
+        )
 
-            case "exit" | "close": # Завершення роботи програми
-                print("👋 Дякуємо за використання блокноту Notes! До нових зустрічей! 🐍")
-                break
-            case "help": # Виведення довідки з усіма доступними командами
-                print( show_help())
+    if args.batch and not (args.contacts or args.notes):
+        parser.error("--batch потребує --contacts або --notes")
+    if args.reminders and (args.batch or args.connect or args.contacts or args.notes):
+        parser.error("--reminders працює окремо або разом із --serve")
+    try:
+        if args.serve:
+            reminders = (args.remind_days, args.reminders_file) if args.reminders else None
+            run_server(args.host, args.port, args.socket, reminders)
+        elif args.reminders:
+            run_reminders(args.remind_days, args.reminders_file)
+        elif args.connect:
+            run_client(args.host, args.port, args.socket)
+        elif args.batch:
+            source = contextlib.nullcontext(sys.stdin) if args.batch == "-" else open(args.batch, encoding="utf-8")
+            with source as lines:
+                if args.contacts:
+                    run_batch(lines, open_batch_address_book, CONTACT_COMMANDS, UNKNOWN_CONTACT_COMMAND, args.save_every)
+                else:
+                    run_batch(lines, lambda: open_notes_book(autoflush=False), NOTE_COMMANDS, UNKNOWN_NOTE_COMMAND, args.save_every)
+        else:
+            print("👋 Вітаємо тебе у світі Snaky sisters 🐍! Тут код не просто працює — він танцює!")
+            if args.contacts:
+                main_contacts()
+            elif args.notes:
+                main_notes()
+            else:
+                main_menu()
+    finally:
+        if args.timing:
+            print(timing_report(), file=sys.stderr)
+
+TIMINGS["імпорт модуля"] = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
-            case _: # заглушка для невідомих (помилкових) команд
-                print("😳 Команда не розпізнана. Можливо, ти винайшла(-ов) нову функцію? Введи help для списку доступного 😅")
-        
 if __name__ == "__main__":
 
-    main_menu()      
\ No newline at end of file
+    main()
@@ -0,0 +1,88 @@
+"""Найближчі дні народження: 29 лютого, перехід через Новий рік і вікна від нуля до понад рік.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Birthday, BirthdayIndex, Record, next_birthday
+
+BIRTHDAYS = { # ім'я -> дата народження
+    "Leap": "29.02.2000",
+    "Eve": "31.12.1990",
+    "New": "01.01.1985",
+    "Feb28": "28.02.1970",
+    "Mar1": "01.03.1999",
+    "Summer": "15.07.2005",
+}
+TODAYS = [date(2023, 1, 1), date(2023, 2, 27), date(2023, 2, 28), date(2023, 3, 1), date(2023, 12, 31),
+          date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1), date(2024, 12, 30), date(2100, 2, 28)]
+
+
+def make_index():
+    records = []
+    for name, birthday in BIRTHDAYS.items():
+        record = Record(name)
+        record.birthday = Birthday(birthday)
+        records.append(record)
+    return BirthdayIndex(records)
+
+
+def scan_upcoming(today, days): # кожен іменинник один раз — у найближче святкування, якщо воно у вікні
+    result = []
+    for name, birthday in BIRTHDAYS.items():
+        occurrence = next_birthday(Birthday(birthday).value.date(), today)
+        if occurrence <= today + timedelta(days=days):
+            result.append((occurrence, name))
+    return sorted(result)
+
+
+class NextBirthdayTest(unittest.TestCase):
+    def test_leap_day(self):
+        leap = date(2000, 2, 29)
+        self.assertEqual(next_birthday(leap, date(2023, 1, 10)), date(2023, 2, 28)) # невисокосний рік
+        self.assertEqual(next_birthday(leap, date(2023, 2, 28)), date(2023, 2, 28))
+        self.assertEqual(next_birthday(leap, date(2023, 3, 1)), date(2024, 2, 29))
+        self.assertEqual(next_birthday(leap, date(2024, 1, 10)), date(2024, 2, 29)) # високосний
+        self.assertEqual(next_birthday(leap, date(2024, 3, 1)), date(2025, 2, 28))
+        self.assertEqual(next_birthday(leap, date(2100, 1, 1)), date(2100, 2, 28)) # 2100 — не високосний
+
+    def test_year_end(self):
+        self.assertEqual(next_birthday(date(1985, 1, 1), date(2023, 12, 31)), date(2024, 1, 1))
+        self.assertEqual(next_birthday(date(1990, 12, 31), date(2023, 12, 31)), date(2023, 12, 31))
+        self.assertEqual(next_birthday(date(1990, 12, 31), date(2024, 1, 1)), date(2024, 12, 31))
+
+
+class UpcomingBirthdaysTest(unittest.TestCase):
+    def test_matches_scan(self):
+        index = make_index()
+        for today in TODAYS:
+            for days in (0, 1, 2, 7, 30, 364, 365, 366, 400, 1000):
+                with self.subTest(today=today, days=days):
+                    result = list(index.upcoming(today, days))
+                    self.assertEqual(sorted(result), scan_upcoming(today, days))
+                    self.assertEqual([day for day, _ in result], sorted(day for day, _ in result)) # за датою
+
+    def test_leap_day_in_non_leap_year(self):
+        self.assertEqual(list(make_index().upcoming(date(2023, 2, 28), 0)), [(date(2023, 2, 28), "Feb28"),
+                                                                            (date(2023, 2, 28), "Leap")])
+        self.assertEqual(list(make_index().upcoming(date(2024, 2, 28), 1)), [(date(2024, 2, 28), "Feb28"),
+                                                                            (date(2024, 2, 29), "Leap")])
+
+    def test_year_end_wrap(self):
+        self.assertEqual(list(make_index().upcoming(date(2023, 12, 31), 1)), [(date(2023, 12, 31), "Eve"),
+                                                                             (date(2024, 1, 1), "New")])
+
+    def test_long_window_has_no_duplicates(self):
+        for today in TODAYS:
+            for days in (365, 366, 1000):
+                names = [name for _, name in make_index().upcoming(today, days)]
+                self.assertEqual(sorted(names), sorted(BIRTHDAYS), (today, days))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Пошук дублікатів: варіанти написання імені з різними телефонами — один контакт, різні email чи дні народження — ні.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CONTACT_COMMANDS, AddressBook
+
+
+def run(book, line):
+    command, *args = line.split()
+    return CONTACT_COMMANDS[command](args, book)
+
+
+class DedupeTest(unittest.TestCase):
+    def make_book(self, *lines):
+        book = AddressBook()
+        for line in lines:
+            run(book, line)
+        return book
+
+    def test_spelling_variants_with_different_phones(self):
+        book = self.make_book("add Maria 0501111111", "add Mariia 0502222222", "add Марія 0503333333")
+        self.assertEqual(book.find_duplicates(), [["Maria", "Mariia", "Марія"]])
+
+    def test_shared_phone(self):
+        book = self.make_book("add Maria 0501111111", "add Petro 0501111111", "add Ivan 0509999999")
+        self.assertEqual(book.find_duplicates(), [["Maria", "Petro"]])
+
+    def test_different_birthdays_are_different_people(self):
+        book = self.make_book("add Maria 0501111111", "add Mariia 0502222222",
+                              "add_birthday Maria 01.02.1990", "add_birthday Mariia 03.04.1985")
+        self.assertEqual(book.find_duplicates(), [])
+
+    def test_different_emails_are_different_people(self):
+        book = self.make_book("add Maria 0501111111", "add Mariia 0502222222",
+                              "add_email Maria maria@example.com", "add_email Mariia mariia@example.com")
+        self.assertEqual(book.find_duplicates(), [])
+
+    def test_merge_joins_phones(self):
+        book = self.make_book("add Maria 0501111111", "add_email Maria maria@example.com", "add Mariia 0502222222")
+        run(book, "dedupe --merge")
+        self.assertEqual(list(book.names()), ["Maria"])
+        self.assertEqual(book.find("Maria").phone_numbers(), ["0501111111", "0502222222"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Індекси пошуку нотаток дають ті самі результати й у тому ж порядку, що й лінійний перебір.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import NoteRecord, NotesBook
+
+ALPHABET = "abAB c" # мало літер — часті збіги триграм і різний регістр
+TAGS = [None, "work", "Work", "home", "HOME", "idea"]
+
+
+def random_text(rnd, low=1, high=12):
+    text = "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(low, high))).strip()
+    return text or "a"
+
+
+# Пошук до появи індексів (лінійний перебір книги)
+def scan_by_name(book, name):
+    return [note for key, note in book.data.items() if name.lower() in key.lower()]
+
+
+def scan_by_text(book, text):
+    return [note for note in book.data.values() if text.lower() in note.text.value.lower()]
+
+
+def scan_by_tag(book, tag):
+    return [note for note in book.data.values() if note.tag and tag.lower() == note.tag.value.lower()]
+
+
+class NotesIndexEquivalenceTest(unittest.TestCase):
+    def check_searches(self, book, rnd):
+        for _ in range(20):
+            query = random_text(rnd, 1, 5)
+            self.assertEqual(book.search_by_name(query), scan_by_name(book, query), query)
+            self.assertEqual(book.search_by_text(query), scan_by_text(book, query), query)
+        for tag in TAGS[1:] + ["WORK", "missing"]:
+            self.assertEqual(book.search_by_tag(tag), scan_by_tag(book, tag), tag)
+
+    def test_random_changes(self):
+        for seed in range(5):
+            rnd = random.Random(seed)
+            book = NotesBook()
+            self.check_searches(book, rnd) # індекс будується на порожній книзі й далі лише оновлюється
+            for step in range(600):
+                names = list(book.data)
+                action = rnd.random()
+                if action < 0.4 or not names:
+                    book.add_note(NoteRecord(random_text(rnd), random_text(rnd, 1, 30), rnd.choice(TAGS)))
+                elif action < 0.6:
+                    book.edit_note_text(rnd.choice(names), random_text(rnd, 1, 30))
+                elif action < 0.7: # повторне додавання з тією ж назвою: новий тег, місце в книзі те саме
+                    name = rnd.choice(names)
+                    book.add_note(NoteRecord(name, book.data[name].text.value, rnd.choice(TAGS)))
+                elif action < 0.85:
+                    new_name = random_text(rnd)
+                    if new_name not in book.data:
+                        book.rename_note(rnd.choice(names), new_name)
+                else:
+                    book.delete_note(rnd.choice(names))
+                if step % 25 == 0:
+                    self.check_searches(book, rnd)
+            self.check_searches(book, rnd)
+
+    def test_bulk_import_rebuilds_index(self):
+        rnd = random.Random(42)
+        book = NotesBook()
+        book.add_note(NoteRecord("first", "seed text", "work"))
+        self.check_searches(book, rnd)
+        book.add_notes([NoteRecord(f"{random_text(rnd)} {i}", random_text(rnd, 1, 30), rnd.choice(TAGS)) for i in range(200)])
+        self.check_searches(book, rnd)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Журнал нотаток: фонове ущільнення, відновлення після збою та знімок, відображений у пам'ять.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import MappedNotes, NoteRecord, NotesBook
+
+TAGS = [None, "work", "home"]
+
+
+def open_book(filename, threshold=1 << 20): # як open_notes_book, але у вказаному файлі
+    book = NotesBook()
+    book.load(filename)
+    if not isinstance(book.data, MappedNotes):
+        book.use_mapped_storage(filename)
+    book.open_journal(filename, threshold)
+    return book
+
+
+def contents(book):
+    return {name: (note.text.value, note.tag.value if note.tag else None) for name, note in book.data.items()}
+
+
+def random_changes(book, model, rnd, prefix, steps):
+    for step in range(steps):
+        names = list(model)
+        action = rnd.random()
+        if action < 0.4 or not names:
+            name = f"{prefix}{rnd.randint(0, 200)}"
+            note = NoteRecord(name, f"text {step} " * rnd.randint(1, 5), rnd.choice(TAGS))
+            book.add_note(note)
+            model[name] = (note.text.value, note.tag.value if note.tag else None)
+        elif action < 0.65:
+            name = rnd.choice(names)
+            book.edit_note_text(name, f"edited {step}")
+            model[name] = (f"edited {step}", model[name][1])
+        elif action < 0.8:
+            old_name, new_name = rnd.choice(names), f"{prefix}r{step}"
+            book.rename_note(old_name, new_name)
+            model[new_name] = model.pop(old_name)
+        else:
+            name = rnd.choice(names)
+            book.delete_note(name)
+            del model[name]
+
+
+class NotesJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.filename = os.path.join(self.tmpdir.name, "notes.json")
+
+    def reopen(self, book, threshold=1 << 20):
+        book.close()
+        return open_book(self.filename, threshold)
+
+    def test_compaction_during_concurrent_changes(self):
+        book = open_book(self.filename, threshold=2000) # ущільнення запускається кожні кілька змін
+        book.make_thread_safe()
+        models = [{} for _ in range(3)]
+
+        def writer(i): # кожен потік працює зі своїми назвами, тож його модель точна
+            random_changes(book, models[i], random.Random(i), f"t{i}-", 400)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(len(models))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = {name: value for model in models for name, value in model.items()}
+        self.assertEqual(contents(book), expected)
+        book = self.reopen(book)
+        self.assertEqual(contents(book), expected)
+        self.assertFalse(os.path.exists(self.filename + ".log.1"))
+        with open(os.path.join(self.tmpdir.name, "notes.idx"), encoding="utf-8") as f:
+            self.assertGreater(json.load(f)["generation"], 5) # ущільнення справді йшли паралельно зі змінами
+        data_files = [name for name in os.listdir(self.tmpdir.name) if name.endswith(".dat")]
+        self.assertEqual(len(data_files), 1, data_files) # старі покоління прибрано
+        book.close()
+
+    def test_recovery_from_interrupted_compaction(self):
+        book = open_book(self.filename)
+        model = {}
+        random_changes(book, model, random.Random(1), "n", 200)
+        book.close()
+        with open(self.filename + ".log", encoding="utf-8") as f:
+            lines = f.readlines()
+        # Збій посеред ущільнення: старша частина журналу вже заморожена, а знімок ще не записано
+        with open(self.filename + ".log.1", "w", encoding="utf-8") as f:
+            f.writelines(lines[:len(lines) // 2])
+        with open(self.filename + ".log", "w", encoding="utf-8") as f:
+            f.writelines(lines[len(lines) // 2:])
+        book = open_book(self.filename)
+        self.assertEqual(contents(book), model)
+        self.assertFalse(os.path.exists(self.filename + ".log.1"))
+        random_changes(book, model, random.Random(2), "m", 50)
+        book = self.reopen(book)
+        self.assertEqual(contents(book), model)
+        book.close()
+
+    def test_torn_last_line(self):
+        book = open_book(self.filename)
+        book.add_note(NoteRecord("first", "kept"))
+        book.close()
+        with open(self.filename + ".log", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "note": {"name": "lost"') # запис обірвався посеред рядка
+        book = open_book(self.filename)
+        self.assertEqual(contents(book), {"first": ("kept", None)})
+        book.add_note(NoteRecord("second", "written after the crash"))
+        book = self.reopen(book)
+        self.assertEqual(contents(book), {"first": ("kept", None), "second": ("written after the crash", None)})
+        book.close()
+
+    def test_last_line_without_newline(self):
+        book = open_book(self.filename)
+        book.add_note(NoteRecord("first", "kept"))
+        book.close()
+        with open(self.filename + ".log", "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "note": {"name": "whole", "text": "no newline", "tag": null}}')
+        book = open_book(self.filename)
+        book.add_note(NoteRecord("second", "next"))
+        book = self.reopen(book)
+        self.assertEqual(set(contents(book)), {"first", "whole", "second"})
+        book.close()
+
+    def test_remap_drops_overlay(self):
+        book = open_book(self.filename)
+        model = {}
+        random_changes(book, model, random.Random(3), "n", 300)
+        self.assertTrue(book.data._changed) # змінені після знімка нотатки поки лише в пам'яті
+        snapshot = book._snapshot()
+        changed_later = sorted(model)[0]
+        book.add_note(NoteRecord(changed_later, "changed after the snapshot", "later")) # новий об'єкт, а не зміна старого
+        model[changed_later] = ("changed after the snapshot", "later")
+        book._write_snapshot(self.filename, snapshot) # як фонове ущільнення: нове покоління й remap
+        self.assertEqual(list(book.data._changed), [changed_later]) # лишилась тільки нотатка, новіша за зріз
+        self.assertEqual(contents(book), model)
+        book.save(self.filename)
+        self.assertEqual(book.data._changed, {})
+        self.assertEqual(contents(book), model)
+        book = self.reopen(book)
+        self.assertEqual(contents(book), model)
+        book.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
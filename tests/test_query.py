@@ -0,0 +1,171 @@
+"""Запити за кількома полями (AddressBook.query) збігаються з перебором усіх контактів.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AddressBook, Address, Birthday, Email, Record, open_address_book
+
+NAMES = ["Anna", "Andrii", "anton", "Bohdan", "Olena", "Oleh", "Марія", "Марко"]
+DOMAINS = ["gmail.com", "Gmail.com", "ukr.net", "example.com"]
+STREETS = ["Лісова", "лісова", "Садова", "Шевченка"]
+
+
+def random_phone(rnd):
+    return "050" + "".join(rnd.choice("0123") for _ in range(7)) # мало цифр — часті спільні префікси
+
+
+def random_record(rnd, name):
+    record = Record(name)
+    for _ in range(rnd.randint(1, 3)):
+        record.add_phone(random_phone(rnd))
+    if rnd.random() < 0.7:
+        record.email = Email(f"user{rnd.randint(0, 99)}@{rnd.choice(DOMAINS)}")
+    if rnd.random() < 0.6:
+        record.address = Address(f"м. Київ, вул. {rnd.choice(STREETS)} {rnd.randint(1, 30)}")
+    if rnd.random() < 0.7:
+        record.birthday = Birthday(f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(1950, 2010)}")
+    return record
+
+
+def mutate(book, rnd, step):
+    names = list(book.names())
+    action = rnd.random()
+    if action < 0.35 or not names:
+        book.add_record(random_record(rnd, f"{rnd.choice(NAMES)}{step}"))
+        return
+    record = book.find(rnd.choice(names))
+    if action < 0.5:
+        record.add_phone(random_phone(rnd))
+    elif action < 0.6 and record.phone_numbers():
+        record.edit_phone(rnd.choice(record.phone_numbers()), random_phone(rnd))
+    elif action < 0.7:
+        record.email = Email(f"user{step}@{rnd.choice(DOMAINS)}")
+    elif action < 0.8:
+        record.address = Address(f"вул. {rnd.choice(STREETS)} {step}")
+    elif action < 0.9:
+        record.birthday = Birthday(f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.2000")
+    else:
+        book.delete(record.name.value)
+
+
+def random_conditions(rnd):
+    conditions = {}
+    while not conditions:
+        if rnd.random() < 0.4:
+            conditions["name_prefix"] = rnd.choice(NAMES)[:rnd.randint(1, 3)]
+        if rnd.random() < 0.4:
+            conditions["email_domain"] = rnd.choice(DOMAINS + ["@ukr.net", "mail.com"])
+        if rnd.random() < 0.3:
+            conditions["address"] = rnd.choice(STREETS)[:rnd.randint(2, 6)]
+        if rnd.random() < 0.4:
+            conditions["phone_prefix"] = random_phone(rnd)[:rnd.randint(3, 7)]
+        if rnd.random() < 0.4:
+            conditions["birthday_month"] = rnd.randint(1, 12)
+    return conditions
+
+
+def matches(record, name_prefix=None, email_domain=None, address=None, phone_prefix=None, birthday_month=None):
+    if name_prefix and not record.name.value.lower().startswith(name_prefix.lower()):
+        return False
+    if email_domain and not (record.email and record.email.value.rsplit("@", 1)[-1].lower() == email_domain.lower().lstrip("@")):
+        return False
+    if address and not (record.address and address.lower() in record.address.value.lower()):
+        return False
+    if phone_prefix and not any(phone.startswith(phone_prefix) for phone in record.phone_numbers()):
+        return False
+    return birthday_month is None or bool(record.birthday and record.birthday.value.month == birthday_month)
+
+
+def scan_query(book, **conditions):
+    return sorted((record.name.value for record in book.stream_records() if matches(record, **conditions)), key=str.lower)
+
+
+def scan_phone_prefix(book, prefix): # пари (номер, ім'я) за номером, як у find_by_phone_prefix
+    return sorted({(phone, record.name.value) for record in book.stream_records()
+                   for phone in record.phone_numbers() if phone.startswith(prefix)})
+
+
+class QueryEquivalenceTest(unittest.TestCase):
+    def check_queries(self, book, rnd):
+        for _ in range(10):
+            conditions = random_conditions(rnd)
+            self.assertEqual([record.name.value for record in book.query(**conditions)],
+                             scan_query(book, **conditions), conditions)
+        for _ in range(5):
+            phone = random_phone(rnd)
+            self.assertEqual([record.name.value for record in book.find_by_phone(phone)],
+                             [name for number, name in scan_phone_prefix(book, phone) if number == phone], phone)
+            prefix = phone[:rnd.randint(3, 8)]
+            self.assertEqual([(number, record.name.value) for number, record in book.find_by_phone_prefix(prefix)],
+                             scan_phone_prefix(book, prefix), prefix)
+
+    def run_random_changes(self, book, rnd, reopen=None):
+        self.check_queries(book, rnd) # індекси будуються рано й далі лише оновлюються
+        for step in range(400):
+            mutate(book, rnd, step)
+            if step % 20 == 0:
+                self.check_queries(book, rnd)
+            if reopen and step % 100 == 99:
+                book = reopen(book)
+        self.check_queries(book, rnd)
+
+    def test_in_memory_book(self):
+        for seed in range(3):
+            self.run_random_changes(AddressBook(), random.Random(seed))
+
+    def test_sqlite_book(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "addressbook.db")
+            legacy = os.path.join(tmpdir, "addressbook.pkl")
+
+            def reopen(book): # ліниве відкриття: записи знову вантажаться зі сховища
+                book.close()
+                return open_address_book(path, legacy)
+
+            book = open_address_book(path, legacy)
+            self.run_random_changes(book, random.Random(7), reopen)
+            book.close()
+
+
+class SqlitePhoneLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "addressbook.db")
+        self.legacy = os.path.join(self.tmpdir.name, "addressbook.pkl")
+        book = open_address_book(self.path, self.legacy)
+        for i in range(50):
+            book.add_record(random_record(random.Random(i), f"Contact{i}"))
+        book.find("Contact7").add_phone("0509999999")
+        book.find("Contact8").add_phone("0509999999")
+        book.close()
+
+    def test_lookup_does_not_load_the_book(self):
+        book = open_address_book(self.path, self.legacy)
+        self.assertEqual([record.name.value for record in book.find_by_phone("0509999999")], ["Contact7", "Contact8"])
+        self.assertEqual(len(book.find_by_phone_prefix("0509999", limit=10)), 2)
+        self.assertEqual(len(book.data), 2) # лише знайдені записи, а не вся книга
+        book.close()
+
+    def test_phones_of_older_database_are_filled_in(self):
+        with sqlite3.connect(self.path) as conn: # база, створена до появи таблиці phones
+            conn.execute("DROP TABLE phones")
+            conn.execute("DELETE FROM meta WHERE key = 'phones_indexed'")
+        conn.close()
+        book = open_address_book(self.path, self.legacy)
+        self.assertEqual([record.name.value for record in book.find_by_phone("0509999999")], ["Contact7", "Contact8"])
+        self.assertEqual([(phone, record.name.value) for phone, record in book.find_by_phone_prefix("050")],
+                         scan_phone_prefix(book, "050"))
+        book.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""Шардоване сховище: збереження й читання, запис лише змінених шардів і параметр --storage.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from main import (DEFAULT_SHARDS, Birthday, Email, NoteRecord, NotesBook, Record, open_address_book,
+                  open_sharded_address_book, storage_option)
+
+COUNT = 200
+
+
+def fill_contacts(book):
+    for i in range(COUNT):
+        record = Record(f"Contact{i:03d}")
+        record.add_phone(f"050{i:07d}")
+        if i % 3:
+            record.email = Email(f"user{i}@ukr.net")
+        if i % 4:
+            record.birthday = Birthday(f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.1990")
+        book.add_record(record)
+
+
+def fill_notes(book):
+    for i in range(COUNT):
+        book.add_note(NoteRecord(f"Note{i:03d}", f"текст {i}", ("робота", None)[i % 2]))
+
+
+def contact_dicts(book):
+    return [record.to_dict() for record in book.stream_records()]
+
+
+def note_dicts(book):
+    return [note.to_dict() for note in book.records()]
+
+
+class ShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_contacts_round_trip(self):
+        for workers in (1, 2): # у цьому процесі та через пул процесів
+            with self.subTest(workers=workers):
+                directory = self.path(f"contacts-{workers}.shards")
+                book = open_sharded_address_book(directory, 4, workers)
+                fill_contacts(book)
+                book.delete("Contact007")
+                expected = contact_dicts(book)
+                book.close()
+                self.assertEqual(len(os.listdir(directory)), 5) # meta.json і чотири шарди
+                book = open_sharded_address_book(directory, 4, workers)
+                self.assertEqual(contact_dicts(book), expected) # порядок додавання зберігається
+                book.close()
+
+    def test_notes_round_trip(self):
+        book = NotesBook()
+        fill_notes(book)
+        self.assertEqual(book.save_shards(self.path("notes.shards"), 4, workers=1), 4)
+        loaded = NotesBook()
+        loaded.load_shards(self.path("notes.shards"), workers=1)
+        self.assertEqual(note_dicts(loaded), note_dicts(book))
+
+    def test_single_change_writes_one_shard(self):
+        directory = self.path("contacts.shards")
+        book = open_sharded_address_book(directory, DEFAULT_SHARDS, workers=1)
+        fill_contacts(book)
+        book.close()
+        book = open_sharded_address_book(directory, workers=1)
+        book.find("Contact042").add_phone("0999999999")
+        store = book.storage.store
+        self.assertEqual(store.save(book.storage.records.__getitem__), 1)
+        self.assertEqual(store.save(book.storage.records.__getitem__), 0) # повторно писати нічого
+        book.delete("Contact043")
+        self.assertEqual(len(store.dirty), 1)
+        book.close()
+
+        notes = NotesBook()
+        fill_notes(notes)
+        notes.save_shards(self.path("notes.shards"), DEFAULT_SHARDS, workers=1)
+        notes.edit_note_text("Note010", "змінено")
+        self.assertEqual(notes.save_shards(), 1)
+        notes.delete_note("Note011")
+        notes.add_note(NoteRecord("Нова", "текст"))
+        self.assertLessEqual(notes.save_shards(), 2)
+        self.assertEqual(notes.save_shards(), 0)
+
+    def test_reopen_with_other_shard_count(self):
+        directory = self.path("contacts.shards")
+        book = open_sharded_address_book(directory, 4, workers=1)
+        fill_contacts(book)
+        expected = contact_dicts(book)
+        book.close()
+        book = open_sharded_address_book(directory, 16, workers=1) # кількість шардів задає каталог
+        self.assertEqual(book.storage.store.shards, 4)
+        self.assertEqual(contact_dicts(book), expected)
+        book.find("Contact001").add_phone("0999999999")
+        book.close()
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["shards"], 4)
+        self.assertFalse(os.path.exists(os.path.join(directory, "shard-04.jsonl")))
+        book = open_sharded_address_book(directory, 2, workers=1)
+        self.assertEqual(book.find("Contact001").phone_numbers(), ["0500000001", "0999999999"])
+        book.close()
+
+        notes = NotesBook()
+        fill_notes(notes)
+        notes.save_shards(self.path("notes.shards"), 4, workers=1)
+        loaded = NotesBook()
+        loaded.load_shards(self.path("notes.shards"), workers=1)
+        self.assertEqual(loaded._shards.shards, 4)
+        self.assertEqual(note_dicts(loaded), note_dicts(notes))
+
+
+class StorageOptionTest(unittest.TestCase):
+    def test_values(self):
+        self.assertIsNone(storage_option("sqlite"))
+        self.assertEqual(storage_option("shards"), DEFAULT_SHARDS)
+        self.assertEqual(storage_option("shards:16"), 16)
+        for value in ("shards:0", "shards:x", "sqlite:2", "json"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                storage_option(value)
+
+    def test_first_run_moves_books_into_shards(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cwd = os.getcwd()
+            os.chdir(tmpdir) # книги відкриваються за типовими іменами в поточному каталозі
+            self.addCleanup(os.chdir, cwd)
+            book = open_address_book()
+            fill_contacts(book)
+            expected = contact_dicts(book)
+            book.close()
+            notes = main.open_notes_book()
+            fill_notes(notes)
+            expected_notes = note_dicts(notes)
+            notes.close()
+
+            main.STORAGE_SHARDS = 4
+            self.addCleanup(setattr, main, "STORAGE_SHARDS", None)
+            book = main.open_contact_book()
+            self.assertEqual(contact_dicts(book), expected)
+            book.find("Contact000").add_phone("0999999999")
+            book.close()
+            notes = main.open_notes_book()
+            self.assertEqual(note_dicts(notes), expected_notes)
+            notes.delete_note("Note000")
+            notes.close()
+
+            book = main.open_contact_book() # далі книги читаються вже з шардів
+            self.assertEqual(book.find("Contact000").phone_numbers(), ["0500000000", "0999999999"])
+            book.close()
+            notes = main.open_notes_book()
+            self.assertEqual(note_dicts(notes), expected_notes[1:])
+            notes.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Бінарний знімок книги та обмежений unpickler старих pickle-файлів.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from main import (SNAPSHOT_BLOCK, SNAPSHOT_COMPRESSION, Address, AddressBook, Birthday, Email, NoteRecord,
+                  NotesBook, Record, load_data, save_data)
+
+COUNT = 2 * SNAPSHOT_BLOCK + 3 # три блоки, останній неповний
+
+
+def make_contacts():
+    book = AddressBook()
+    for i in range(COUNT):
+        record = Record(f"Контакт {i}" if i % 2 else f"Contact {i}")
+        for j in range(i % 3): # буває й зовсім без телефонів
+            record.add_phone(f"050{i:05d}{j:02d}")
+        if i % 4:
+            record.email = Email(f"user{i}@{('gmail.com', 'ukr.net')[i % 2]}")
+        if i % 5:
+            record.address = Address(f"м. Київ, вул. Лісова {i}")
+        if i % 6:
+            record.birthday = Birthday(f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.{1950 + i % 60}")
+        book.add_record(record)
+    return book
+
+
+def make_notes():
+    book = NotesBook()
+    for i in range(COUNT):
+        book.add_note(NoteRecord(f"Нотатка {i}", f"Текст «{i}» — їжак", ("робота", "дім", None)[i % 3]))
+    return book
+
+
+class Evil: # pickle, який при розпаковуванні викликав би os.system
+    def __reduce__(self):
+        return os.system, ("echo unsafe",)
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_contacts_round_trip(self):
+        book = make_contacts()
+        expected = [record.to_dict() for record in book.stream_records()]
+        for compression in SNAPSHOT_COMPRESSION:
+            with self.subTest(compression=compression):
+                save_data(book, self.path("contacts.snap"), compression)
+                loaded = load_data(self.path("contacts.snap"))
+                self.assertEqual([record.to_dict() for record in loaded.stream_records()], expected)
+
+    def test_notes_round_trip(self):
+        book = make_notes()
+        expected = [note.to_dict() for note in book.records()]
+        mapped = NotesBook() # notes.idx поруч не має заступати знімок notes.snap
+        mapped.add_note(NoteRecord("інша", "книга"))
+        mapped.use_mapped_storage(self.path("notes.json"))
+        for compression in SNAPSHOT_COMPRESSION:
+            with self.subTest(compression=compression):
+                book.save_binary(self.path("notes.snap"), compression)
+                loaded = NotesBook()
+                loaded.load(self.path("notes.snap"))
+                self.assertEqual([note.to_dict() for note in loaded.records()], expected)
+
+    def test_truncated_snapshot(self):
+        save_data(make_contacts(), self.path("contacts.snap"), None)
+        with open(self.path("contacts.snap"), "rb") as f:
+            data = f.read()
+        for size in (6, 20, len(data) // 2, len(data) - 4): # заголовок, перший блок, середина, без позначки кінця
+            with self.subTest(size=size):
+                with open(self.path("truncated.snap"), "wb") as f:
+                    f.write(data[:size])
+                with self.assertRaises(ValueError):
+                    load_data(self.path("truncated.snap"))
+
+    def test_wrong_kind(self):
+        make_notes().save_binary(self.path("notes.snap"))
+        with self.assertRaises(ValueError):
+            load_data(self.path("notes.snap"))
+        save_data(make_contacts(), self.path("contacts.snap"))
+        with self.assertRaises(ValueError):
+            NotesBook().load(self.path("contacts.snap"))
+
+    def test_pickle_cannot_run_code(self):
+        with open(self.path("evil.pkl"), "wb") as f:
+            pickle.dump(Evil(), f)
+        with self.assertRaises(pickle.UnpicklingError):
+            load_data(self.path("evil.pkl"))
+
+    def test_legacy_pickle(self):
+        book = load_data(os.path.join(ROOT, "addressbook.pkl"))
+        self.assertIsInstance(book, AddressBook)
+        self.assertEqual(list(book.data), ["Sofia", "Maria", "Tom", "Oksana"])
+        tom = book.find("Tom").to_dict()
+        self.assertEqual(tom, {"name": "Tom", "phones": ["0684551147"], "email": "tomtom@gmail.com",
+                               "address": "м. Київ вул. Лісова 25", "birthday": "27.07.2025"})
+        self.assertIsNone(book.find("Maria").email)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Потокові відповіді (all, query): помилка під час друку стає останнім рядком, а не зупиняє програму.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CONTACT_COMMANDS, NOTE_COMMANDS, NoteRecord, NotesBook, open_address_book
+
+
+class BrokenStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_corrupt_contact_row(self):
+        book = open_address_book(self.path("addressbook.db"), self.path("addressbook.pkl"))
+        for name, phone in (("Anna", "0501111111"), ("Bad", "0502222222"), ("Zed", "0503333333")):
+            CONTACT_COMMANDS["add"]([name, phone], book)
+        book.close()
+        with sqlite3.connect(self.path("addressbook.db")) as conn:
+            conn.execute("UPDATE contacts SET phones = '12x' WHERE name = 'Bad'")
+        conn.close()
+        book = open_address_book(self.path("addressbook.db"), self.path("addressbook.pkl"))
+        lines = list(CONTACT_COMMANDS["all"]([], book))
+        self.assertIn("Anna", lines[0])
+        self.assertTrue(lines[-1].startswith("⚠️ Не вдалося дочитати відповідь"), lines[-1])
+        book.close()
+
+    def test_corrupt_mapped_note(self):
+        book = NotesBook()
+        for i in range(3):
+            book.add_note(NoteRecord(f"n{i}", "text"))
+        book.use_mapped_storage(self.path("notes.json"))
+        with open(self.path("notes.idx"), encoding="utf-8") as f:
+            info = json.load(f)
+        with open(self.path(info["data"]), "r+b") as f: # псуємо другий рядок знімка
+            f.seek(info["offsets"][1])
+            f.write(b"#####")
+        book = NotesBook()
+        book.load(self.path("notes.json"))
+        lines = list(NOTE_COMMANDS["all"]([], book))
+        self.assertIn("n0", lines[0])
+        self.assertTrue(lines[-1].startswith("⚠️ Не вдалося дочитати відповідь"), lines[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""Потокобезпечний режим: RWLock і спільні книги під одночасними читаннями та змінами.
+
+Запуск: python -m unittest discover tests  (або python -m pytest tests)
+"""
+import os
+import random
+import sys
+import threading
+import traceback
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+TAGS = ["робота", "дім", "python", None]
+SIZE = 2_000      # початкова кількість контактів і нотаток
+OPERATIONS = 200  # дій кожного потоку: перевірка обмежена кількістю дій, а не часом
+READERS, WRITERS = 6, 2
+
+
+def make_books(rng):
+    contacts, notes = main.AddressBook(), main.NotesBook()
+    for i in range(SIZE):
+        record = main.Record(f"Contact{i:05d}")
+        record.add_phone(f"{rng.randrange(10 ** 9, 10 ** 10)}")
+        if rng.random() < 0.7:
+            record.add_birthday(f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.1990")
+        contacts.add_record(record)
+        notes.add_note(main.NoteRecord(f"Note{i:05d}", f"кава python {i}", rng.choice(TAGS)))
+    return contacts, notes
+
+
+def reader(contacts, notes, rng):
+    action = rng.randrange(8)
+    if action == 0:
+        sum(1 for _ in main.iter_contacts(contacts))
+    elif action == 1:
+        contacts.get_upcoming_birthdays(30)
+    elif action == 2:
+        contacts.find_by_phone_prefix(str(rng.randrange(10, 100)), limit=50)
+    elif action == 3:
+        contacts.fuzzy_find(f"Contact{rng.randrange(SIZE):05d}", limit=3)
+    elif action == 4:
+        sum(1 for _ in main.iter_notes(notes))
+    elif action == 5:
+        notes.search_by_tag(rng.choice(TAGS[:-1]))
+    elif action == 6:
+        notes.search_by_text(rng.choice(("кав", "python", "edited")))
+    else:
+        notes.tag_counts()
+
+
+def writer(contacts, notes, rng, serial):
+    action = rng.randrange(7)
+    name = f"Stress{rng.randrange(200):04d}"
+    if action == 0:
+        record = main.Record(name)
+        record.add_phone(f"{rng.randrange(10 ** 9, 10 ** 10)}")
+        contacts.add_record(record)
+    elif action == 1:
+        record = contacts.find(name)
+        if record:
+            record.add_birthday(f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.1990")
+    elif action == 2:
+        record = contacts.find(name)
+        if record:
+            record.replace_phones([f"{rng.randrange(10 ** 9, 10 ** 10)}"])
+    elif action == 3:
+        contacts.delete(name)
+    elif action == 4:
+        notes.add_note(main.NoteRecord(name, f"stress {serial} python", rng.choice(TAGS)))
+    elif action == 5:
+        if name in notes.data:
+            try:
+                notes.edit_note_text(name, f"edited {serial} кава")
+            except KeyError: # нотатку видалив інший письменник між перевіркою і зміною
+                pass
+    else:
+        notes.delete_note(name)
+
+
+def bucket_sets(buckets):
+    return {key: set(names) for key, names in buckets.items() if names}
+
+
+class SharedBooksStressTest(unittest.TestCase):
+    def test_concurrent_readers_and_writers(self):
+        contacts, notes = make_books(random.Random(0))
+        contacts.make_thread_safe()
+        notes.make_thread_safe()
+        for kind in (main.PhoneIndex, main.BirthdayIndex, main.FuzzyNameIndex): # індекси оновлюються під навантаженням
+            contacts._index(kind)
+        notes._get_index()
+        errors = []
+
+        def worker(kind, seed):
+            rng = random.Random(seed)
+            try:
+                for serial in range(OPERATIONS):
+                    if kind == "reader":
+                        reader(contacts, notes, rng)
+                    else:
+                        writer(contacts, notes, rng, serial)
+            except Exception:
+                errors.append(traceback.format_exc())
+
+        threads = [threading.Thread(target=worker, args=("reader", i)) for i in range(READERS)]
+        threads += [threading.Thread(target=worker, args=("writer", 1000 + i)) for i in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        # Індекси, що оновлювалися під навантаженням, збігаються з перебудованими з нуля
+        self.assertEqual(contacts._index(main.PhoneIndex).phones, main.PhoneIndex(contacts.records()).phones)
+        self.assertEqual(bucket_sets(contacts._index(main.BirthdayIndex).buckets),
+                         bucket_sets(main.BirthdayIndex(contacts.records()).buckets))
+        self.assertEqual(bucket_sets(notes._get_index().tags), bucket_sets(main.NotesIndex(notes.records()).tags))
+
+
+class RWLockTest(unittest.TestCase):
+    def run_in_thread(self, func): # виконує func в іншому потоці; True, якщо вона завершилась за 0,2 с
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (func(), done.set()))
+        thread.start()
+        finished = done.wait(0.2)
+        return thread, finished
+
+    def test_nested_reads(self):
+        lock = main.RWLock()
+
+        def read():
+            with lock.read():
+                pass
+
+        with lock.read():
+            with lock.read():
+                pass
+            thread, finished = self.run_in_thread(read) # інший читач не чекає
+            self.assertTrue(finished)
+            thread.join()
+
+    def test_reentrant_write(self):
+        lock = main.RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read(): # читання всередині запису того ж потоку
+                    pass
+        with lock.write(): # блокування звільнено повністю
+            pass
+
+    def test_read_to_write_upgrade_is_refused(self):
+        lock = main.RWLock()
+        with lock.read():
+            with self.assertRaises(RuntimeError):
+                with lock.write():
+                    pass
+        with lock.write(): # відмова не залишила блокування зайнятим
+            pass
+
+    def test_writer_excludes_readers(self):
+        lock = main.RWLock()
+
+        def read():
+            with lock.read():
+                pass
+
+        with lock.write():
+            thread, finished = self.run_in_thread(read)
+            self.assertFalse(finished) # читач чекає, поки письменник працює
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+
+    def test_reader_excludes_writer(self):
+        lock = main.RWLock()
+
+        def write():
+            with lock.write():
+                pass
+
+        with lock.read():
+            thread, finished = self.run_in_thread(write)
+            self.assertFalse(finished)
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()